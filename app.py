@@ -15,9 +15,16 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from prediction import (
     get_model_and_vectorizer, analyze_feedback,
-    analyze_batch, compute_summary_stats, SENTIMENT_COLORS
+    analyze_batch, compute_summary_stats, dedupe_texts, fan_out, SENTIMENT_COLORS,
+    collapse_near_duplicate_feedback
 )
 from aspect_extraction import get_all_aspects
+from result_cache import ResultCache
+from result_store import ResultStore
+from near_duplicates import NEAR_DUPLICATE_THRESHOLD
+
+# Rows per analyze_batch call in batch mode (one progress-bar step each)
+BATCH_CHUNK_ROWS = 500
 
 def sent_to_scale(confidence: float, sentiment: str) -> int:
     """1=Strongly Negative, 2=Negative, 3=Neutral, 4=Positive, 5=Strongly Positive"""
@@ -429,6 +436,16 @@ hr { border-color:var(--b0)!important; }
 def load_ml_model():
     return get_model_and_vectorizer()
 
+@st.cache_resource(show_spinner=False)
+def get_result_cache():
+    # One cache shared by every session; ResultCache is thread-safe
+    return ResultCache()
+
+@st.cache_resource(show_spinner=False)
+def get_result_store():
+    # Persists results across runs, so re-uploaded rows are not re-analysed
+    return ResultStore()
+
 PT = dict(
     paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
     font=dict(family='Helvetica Neue, Helvetica, Arial, sans-serif', color='#9490b0'),
@@ -1151,7 +1168,7 @@ elif nav == "single" and model_ready:
 
     if (analyze_btn or ex1 or ex2 or ex3) and active_text.strip():
         with st.spinner("Analysing…"):
-            result = analyze_feedback(active_text, model, vectorizer)
+            result = analyze_feedback(active_text, model, vectorizer, cache=get_result_cache())
         st.session_state['single_result'] = result
         st.session_state['single_text']   = active_text
         # Pre-build charts HTML for download
@@ -1343,14 +1360,31 @@ elif nav == "batch" and model_ready:
                 df = df.dropna(subset=['feedback'])
                 st.success(f"✓ Loaded {len(df)} feedback entries")
 
+                merge_near = st.checkbox(
+                    "Merge near-duplicate entries",
+                    help=f"Entries at least {NEAR_DUPLICATE_THRESHOLD:.0%} similar in wording that also "
+                         "share their aspects, sentiment and negation words, phrases and sarcasm cues "
+                         "take the analysis of the first one; a merged entry can still differ from "
+                         "its own analysis in ways these checks do not see.")
                 if st.button("Run Batch Analysis →", type="primary"):
                     prog = st.progress(0); status = st.empty()
-                    texts = df['feedback'].tolist(); batch = []
-                    for i, text in enumerate(texts):
-                        r = analyze_feedback(str(text), model, vectorizer)
-                        batch.append(r)
-                        prog.progress((i+1)/len(texts))
-                        status.text(f"Analysing {i+1}/{len(texts)}…")
+                    texts = [str(t) for t in df['feedback'].tolist() if str(t).strip()]; batch = []
+                    # Duplicates across the whole export are analysed once, then fanned out
+                    unique, index = dedupe_texts(texts)
+                    st.session_state['batch_near_stats'] = None
+                    if merge_near:
+                        unique, near_index, near_stats = collapse_near_duplicate_feedback(
+                            unique, NEAR_DUPLICATE_THRESHOLD)
+                        index = [near_index[i] for i in index]
+                        st.session_state['batch_near_stats'] = near_stats
+                    # Chunked so the progress bar moves; each chunk is scored in bulk
+                    for i in range(0, len(unique), BATCH_CHUNK_ROWS):
+                        batch.extend(analyze_batch(unique[i:i+BATCH_CHUNK_ROWS], model, vectorizer,
+                                                   cache=get_result_cache(), store=get_result_store()))
+                        done = min(i+BATCH_CHUNK_ROWS, len(unique))
+                        prog.progress(done/len(unique))
+                        status.text(f"Analysing {done}/{len(unique)} unique entries…")
+                    batch = fan_out(batch, texts, index, reprocess=merge_near)
                     prog.empty(); status.empty()
                     st.session_state.batch_results = batch
                     st.session_state.show_count    = 10
@@ -1393,6 +1427,12 @@ elif nav == "batch" and model_ready:
                     ]:
                         with col:
                             st.markdown(f'<div class="mc {cls}"><div class="mc-val">{cnt}</div><div class="mc-lbl">{lbl}</div></div>', unsafe_allow_html=True)
+                    if stats['duplicate_pct']:
+                        st.caption(f"{stats['unique']} unique entries · {stats['duplicate_pct']}% duplicates (each analysed once)")
+                    near_stats = st.session_state.get('batch_near_stats')
+                    if near_stats and near_stats['collapsed_rows']:
+                        st.caption(f"{near_stats['collapsed_rows']} near-duplicates merged into "
+                                   f"{near_stats['multi_row_clusters']} groups (largest: {near_stats['largest_cluster']} entries)")
 
                     st.markdown('<div class="slbl">Visualisations</div>', unsafe_allow_html=True)
                     ch1, ch2 = st.columns([1, 2])
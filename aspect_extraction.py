@@ -3,8 +3,42 @@ aspect_extraction.py
 --------------------
 Identifies aspects mentioned in student feedback using keyword mapping.
 Predefined aspects: Faculty, Infrastructure, Curriculum, Placements, Management.
+Keywords are compiled once into a single-pass matcher (see phrase_matcher).
+Custom taxonomies can be loaded from JSON / YAML files; their compiled
+matchers are cached and reloaded when the file changes.
 """
 
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import warnings
+from bisect import bisect_left
+from collections import OrderedDict, namedtuple
+from itertools import accumulate
+
+import numpy as np
+from scipy import sparse
+
+from phrase_matcher import PhraseMatcher
+
+# Documents joined per matching pass in the batch API
+BATCH_CHUNK_SIZE = 10_000
+
+# Taxonomy file used when no taxonomy is passed explicitly
+TAXONOMY_ENV_VAR = "ABSA_TAXONOMY"
+# Seconds between mtime checks of a cached taxonomy file
+TAXONOMY_CHECK_INTERVAL = 1.0
+
+# Default budget of the tenant matcher registry
+TENANT_MAX_ENTRIES = 64
+TENANT_MAX_BYTES = 64 * 1024 * 1024
+
+# One keyword hit: the aspect it signals, the keyword, and its span in the text
+AspectMatch = namedtuple("AspectMatch", ["aspect", "keyword", "start", "end"])
+
 # Keyword dictionary mapping aspect names to related keywords
 ASPECT_KEYWORDS = {
     "Faculty": [
@@ -43,40 +77,396 @@ ASPECT_KEYWORDS = {
 }
 
 
-def extract_aspects(text: str) -> list:
+def _original_offsets(text: str, lowered: str, start: int, end: int) -> tuple:
+    """Map a span of text.lower() back to `text` when lowercasing changed lengths."""
+    if len(lowered) == len(text):
+        return start, end
+    starts = [0, *accumulate(len(ch.lower()) for ch in text)]
+    return bisect_left(starts, start + 1) - 1, bisect_left(starts, end)
+
+
+class AspectMatcher:
+    """
+    Compiled whole-word matcher for an aspect -> keywords mapping, applied to
+    the lowercased text. Finds every aspect hit with a single scan.
+    """
+
+    def __init__(self, aspect_keywords: dict):
+        self.aspect_keywords = {aspect: list(kws) for aspect, kws in aspect_keywords.items()}
+        self.aspects = list(self.aspect_keywords)
+        # Content hash of the taxonomy, e.g. for keying cached results
+        self.version = hashlib.sha1(
+            json.dumps(self.aspect_keywords, sort_keys=False).encode("utf-8")
+        ).hexdigest()[:16]
+
+        # keyword -> aspects it signals (some keywords belong to several)
+        self.keyword_aspects = {}
+        for aspect, keywords in self.aspect_keywords.items():
+            for keyword in keywords:
+                self.keyword_aspects.setdefault(keyword, []).append(aspect)
+        self._phrases = PhraseMatcher(self.keyword_aspects, whole_word=True)
+
+        # Column order of keyword_matrix(), and the keyword x aspect mapping
+        self.keywords = list(self._phrases.phrases)
+        aspect_index = {aspect: j for j, aspect in enumerate(self.aspects)}
+        pairs = [(i, aspect_index[a]) for i, kw in enumerate(self.keywords)
+                 for a in self.keyword_aspects[kw]]
+        self.keyword_to_aspect = sparse.csr_matrix(
+            (np.ones(len(pairs), dtype=np.int32), ([i for i, _ in pairs], [j for _, j in pairs])),
+            shape=(len(self.keywords), len(self.aspects))
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """Rough memory footprint: keyword strings, compiled regexes, matrix."""
+        regex_bytes = sum(4 * len(r.pattern) for r in
+                          (self._phrases._regex, self._phrases._corpus_regex))
+        matrix = self.keyword_to_aspect
+        return (sum(sys.getsizeof(k) for k in self.keywords) + regex_bytes
+                + matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes)
+
+    def find_matches(self, text: str) -> list:
+        """
+        Every keyword hit in `text` as AspectMatch(aspect, keyword, start, end),
+        ordered by position; offsets index into `text` itself.
+        """
+        lowered = text.lower()
+        matches = []
+        for m in self._phrases.finditer(lowered):
+            start, end = _original_offsets(text, lowered, m.start, m.end)
+            matches.extend(AspectMatch(aspect, m.phrase, start, end)
+                           for aspect in self.keyword_aspects[m.phrase])
+        return matches
+
+    def aspects_from_matches(self, matches: list) -> list:
+        """Detected aspects in taxonomy order, or ['General'] if none."""
+        found = {m.aspect for m in matches}
+        detected = [aspect for aspect in self.aspects if aspect in found]
+        return detected if detected else ["General"]
+
+    def extract(self, text: str) -> list:
+        """Detected aspects in taxonomy order, or ['General'] if none."""
+        found = set()
+        for keyword in self._phrases.findall(text.lower()):
+            found.update(self.keyword_aspects[keyword])
+        detected = [aspect for aspect in self.aspects if aspect in found]
+        return detected if detected else ["General"]
+
+    def keyword_matrix(self, texts: list) -> sparse.csr_matrix:
+        """
+        Document x keyword hit counts for a whole corpus (columns follow
+        self.keywords). Each chunk of documents is joined and scanned once.
+        """
+        rows, cols = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.int64)]
+        for offset in range(0, len(texts), BATCH_CHUNK_SIZE):
+            chunk = [t.lower() for t in texts[offset:offset + BATCH_CHUNK_SIZE]]
+            doc_ids, keyword_ids = self._phrases.document_hits(chunk)
+            rows.append(doc_ids + offset)
+            cols.append(keyword_ids)
+        rows, cols = np.concatenate(rows), np.concatenate(cols)
+        return sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.int32), (rows, cols)),
+            shape=(len(texts), len(self.keywords))
+        )
+
+    def aspect_matrix(self, texts: list) -> sparse.csr_matrix:
+        """Document x aspect boolean matrix (columns follow self.aspects)."""
+        matrix = (self.keyword_matrix(texts) @ self.keyword_to_aspect) > 0
+        matrix.sort_indices()
+        return matrix
+
+    def extract_batch(self, texts: list) -> list:
+        """extract() for every text, computed through aspect_matrix()."""
+        matrix = self.aspect_matrix(texts)
+        indptr, indices = matrix.indptr.tolist(), matrix.indices.tolist()
+        aspects = self.aspects
+        # Most rows share a handful of aspect patterns; build each list once
+        names = {}
+        results = []
+        for i in range(len(texts)):
+            row = tuple(indices[indptr[i]:indptr[i + 1]])
+            if row not in names:
+                names[row] = [aspects[j] for j in row] or ["General"]
+            results.append(list(names[row]))
+        return results
+
+
+def load_taxonomy(path: str) -> dict:
+    """
+    Read an aspect -> keywords mapping from a JSON or YAML file.
+
+    Parameters:
+        path (str): .json, .yaml or .yml file holding {aspect: [keyword, ...]}.
+
+    Returns:
+        dict: The taxonomy, with keywords lowercased (matching is done on
+        lowercased text).
+    """
+    with open(path, encoding="utf-8") as f:
+        if os.path.splitext(path)[1].lower() in (".yaml", ".yml"):
+            try:
+                import yaml
+            except ImportError as e:
+                raise ImportError("YAML taxonomies need PyYAML: pip install pyyaml") from e
+            try:
+                data = yaml.safe_load(f)
+            except yaml.YAMLError as e:
+                raise ValueError(f"{path}: {e}") from e
+        else:
+            data = json.load(f)
+
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: expected a mapping of aspect -> keyword list")
+    taxonomy = {}
+    for aspect, keywords in data.items():
+        if not isinstance(keywords, list) or not all(isinstance(k, str) for k in keywords):
+            raise ValueError(f"{path}: keywords for {aspect!r} must be a list of strings")
+        taxonomy[str(aspect)] = [k.lower() for k in keywords]
+    return taxonomy
+
+
+def reload_taxonomy(path: str, previous: tuple = None) -> tuple:
+    """
+    (stamp, matcher) for a taxonomy file, recompiled only if its mtime or
+    size differs from `previous`, the last (stamp, matcher) loaded from it.
+    While the file is unreadable or invalid the previous matcher is kept,
+    with a warning; with no previous matcher the error is raised.
+    """
+    try:
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        if previous is not None and previous[0] == stamp:
+            return previous
+        return stamp, AspectMatcher(load_taxonomy(path))
+    except (OSError, ValueError) as e:
+        if previous is None:
+            raise
+        warnings.warn(f"Could not reload taxonomy {path}: {e}")
+        return previous
+
+
+class TaxonomyCache:
+    """
+    Compiled AspectMatchers keyed by taxonomy file. A file is re-stat'ed at
+    most every `check_interval` seconds and recompiled when its mtime or
+    size changes; the new matcher replaces the old one in a single dict
+    assignment, so concurrent readers see either the old or the new matcher.
+    """
+
+    def __init__(self, check_interval: float = TAXONOMY_CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._entries = {}  # abspath -> (stamp, matcher, checked_at)
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> AspectMatcher:
+        """Return the compiled matcher for `path`, reloading it if the file changed."""
+        path = os.path.abspath(path)
+        entry = self._entries.get(path)
+        now = time.monotonic()
+        if entry is not None and now - entry[2] < self.check_interval:
+            return entry[1]
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and now - entry[2] < self.check_interval:
+                return entry[1]  # refreshed by another thread meanwhile
+            stamp, matcher = reload_taxonomy(path, entry[:2] if entry is not None else None)
+            self._entries[path] = (stamp, matcher, now)
+            return matcher
+
+    def clear(self):
+        """Drop every cached matcher."""
+        with self._lock:
+            self._entries = {}
+
+
+class AspectMatcherRegistry:
+    """
+    Tenant-keyed AspectMatchers with LRU eviction. register() only records
+    a tenant's taxonomy; it is compiled on first use and kept until the
+    registry exceeds `max_entries` matchers or `max_bytes` (AspectMatcher.nbytes),
+    at which point the least recently used tenants are evicted. Inline and
+    file-based taxonomies share the same budget; files are re-stat'ed at
+    most every `check_interval` seconds and recompiled when they change.
+    """
+
+    def __init__(self, max_entries: int = TENANT_MAX_ENTRIES, max_bytes: int = TENANT_MAX_BYTES,
+                 check_interval: float = TAXONOMY_CHECK_INTERVAL):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.check_interval = check_interval
+        self._taxonomies = {}            # tenant -> dict or file path
+        self._matchers = OrderedDict()   # tenant -> (file stamp, matcher, checked_at), oldest first
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def register(self, tenant: str, aspects: dict = None, path: str = None, extend_defaults: bool = True):
+        """
+        Set a tenant's taxonomy, replacing any previous one.
+
+        Parameters:
+            tenant (str): Tenant id, e.g. an institution code.
+            aspects (dict): {aspect: [keywords]}. With extend_defaults the
+                keywords are added to ASPECT_KEYWORDS (new aspects appended).
+            path (str): Taxonomy file instead of `aspects`; used as-is and
+                hot-reloaded when the file changes.
+        """
+        if (aspects is None) == (path is None):
+            raise ValueError("Pass exactly one of aspects= or path=")
+        if path is not None:
+            taxonomy = os.path.abspath(path)
+        else:
+            taxonomy = {a: list(kws) for a, kws in ASPECT_KEYWORDS.items()} if extend_defaults else {}
+            for aspect, keywords in aspects.items():
+                taxonomy.setdefault(aspect, []).extend(k.lower() for k in keywords)
+        with self._lock:
+            self._taxonomies[tenant] = taxonomy
+            self._evict(tenant)
+
+    def unregister(self, tenant: str):
+        """Forget a tenant and drop its compiled matcher."""
+        with self._lock:
+            self._taxonomies.pop(tenant, None)
+            self._evict(tenant)
+
+    def tenants(self) -> list:
+        return list(self._taxonomies)
+
+    def get(self, tenant: str) -> AspectMatcher:
+        """Compiled matcher for `tenant`; KeyError if it was never registered."""
+        now = time.monotonic()
+        with self._lock:
+            if tenant not in self._taxonomies:
+                raise KeyError(f"Unknown tenant: {tenant!r}")
+            taxonomy = self._taxonomies[tenant]
+            entry = self._matchers.get(tenant)
+            if entry is not None and (not isinstance(taxonomy, str) or now - entry[2] < self.check_interval):
+                self._matchers.move_to_end(tenant)
+                return entry[1]
+
+        # Compile (or re-stat) outside the lock so other tenants are not held up
+        if isinstance(taxonomy, str):
+            stamp, matcher = reload_taxonomy(taxonomy, entry[:2] if entry is not None else None)
+        else:
+            stamp, matcher = None, AspectMatcher(taxonomy)
+
+        with self._lock:
+            if self._taxonomies.get(tenant) is not taxonomy:
+                return matcher  # re-registered meanwhile; don't cache a stale matcher
+            current = self._matchers.get(tenant)
+            if current is not None and current is not entry:
+                self._matchers.move_to_end(tenant)
+                return current[1]  # another thread got here first
+            self._evict(tenant)
+            self._matchers[tenant] = (stamp, matcher, now)
+            self._bytes += matcher.nbytes
+            while len(self._matchers) > 1 and (len(self._matchers) > self.max_entries
+                                               or self._bytes > self.max_bytes):
+                self._evict(next(iter(self._matchers)))
+            return matcher
+
+    def _evict(self, tenant: str):
+        entry = self._matchers.pop(tenant, None)
+        if entry is not None:
+            self._bytes -= entry[1].nbytes
+
+    def stats(self) -> dict:
+        """Cached matcher count and estimated bytes against the budget."""
+        with self._lock:
+            return {"tenants": len(self._taxonomies), "entries": len(self._matchers),
+                    "bytes": self._bytes, "max_entries": self.max_entries,
+                    "max_bytes": self.max_bytes}
+
+
+_DEFAULT_MATCHER = AspectMatcher(ASPECT_KEYWORDS)
+_TAXONOMY_CACHE = TaxonomyCache()
+TENANTS = AspectMatcherRegistry()
+
+
+def register_tenant(tenant: str, aspects: dict = None, path: str = None, extend_defaults: bool = True):
+    """Register a tenant taxonomy in the default registry (see AspectMatcherRegistry.register)."""
+    TENANTS.register(tenant, aspects, path, extend_defaults)
+
+
+def get_matcher(taxonomy=None, tenant: str = None) -> AspectMatcher:
+    """
+    Resolve a taxonomy argument to a compiled AspectMatcher.
+
+    Parameters:
+        taxonomy: None for the default (the file named by $ABSA_TAXONOMY if
+            set, else ASPECT_KEYWORDS), a path to a taxonomy file, or an
+            AspectMatcher.
+        tenant (str): Use the tenant's registered taxonomy instead.
+    """
+    if tenant is not None:
+        return TENANTS.get(tenant)
+    if isinstance(taxonomy, AspectMatcher):
+        return taxonomy
+    if taxonomy is None:
+        taxonomy = os.environ.get(TAXONOMY_ENV_VAR)
+        if not taxonomy:
+            return _DEFAULT_MATCHER
+    return _TAXONOMY_CACHE.get(os.fspath(taxonomy))
+
+
+def extract_aspects(text: str, taxonomy=None, tenant: str = None) -> list:
     """
     Identify which aspects are mentioned in the given feedback text.
 
     Parameters:
         text (str): Raw or preprocessed feedback string.
+        taxonomy: Optional taxonomy file or AspectMatcher (see get_matcher).
+        tenant (str): Optional registered tenant whose taxonomy to use.
 
     Returns:
         list: List of detected aspect names. Returns ['General'] if none found.
     """
-    text_lower = text.lower()
-    detected = []
+    return get_matcher(taxonomy, tenant).extract(text)
 
-    for aspect, keywords in ASPECT_KEYWORDS.items():
-        for keyword in keywords:
-            # Match whole words to avoid false positives
-            pattern = r'\b' + re.escape(keyword) + r'\b'
-            if re.search(pattern, text_lower):
-                if aspect not in detected:
-                    detected.append(aspect)
-                break  # One match per aspect is enough
 
-    return detected if detected else ["General"]
+def extract_aspects_batch(texts: list, taxonomy=None) -> list:
+    """
+    Vectorised extract_aspects over a corpus: one matching pass per chunk,
+    reduced to document x aspect through a keyword -> aspect matrix.
 
+    Returns:
+        list: One aspect list per text, identical to extract_aspects(text).
+    """
+    return get_matcher(taxonomy).extract_batch(list(texts))
 
-def get_aspect_keywords(aspect: str) -> list:
-    """Return the keyword list for a given aspect."""
-    return ASPECT_KEYWORDS.get(aspect, [])
 
+def aspect_matrix(texts: list, taxonomy=None) -> tuple:
+    """
+    Document x aspect boolean matrix for a corpus.
+
+    Returns:
+        tuple: (scipy.sparse.csr_matrix, list of aspect names for the columns)
+    """
+    matcher = get_matcher(taxonomy)
+    return matcher.aspect_matrix(list(texts)), list(matcher.aspects)
 
-def get_all_aspects() -> list:
-    """Return all predefined aspect names."""
-    return list(ASPECT_KEYWORDS.keys())
+
+def find_aspect_matches(text: str, taxonomy=None) -> list:
+    """
+    Locate every aspect keyword in the text.
+
+    Returns:
+        list: AspectMatch(aspect, keyword, start, end) tuples ordered by
+        position, e.g. for clause assignment or highlighting in the UI.
+    """
+    return get_matcher(taxonomy).find_matches(text)
+
+
+def aspects_from_matches(matches: list, taxonomy=None) -> list:
+    """Reduce find_aspect_matches() output to extract_aspects() output."""
+    return get_matcher(taxonomy).aspects_from_matches(matches)
+
+
+def get_aspect_keywords(aspect: str, taxonomy=None, tenant: str = None) -> list:
+    """Return the keyword list for a given aspect."""
+    return list(get_matcher(taxonomy, tenant).aspect_keywords.get(aspect, []))
 
 
-# Import re here since it's used inside extract_aspects
-import re
+def get_all_aspects(taxonomy=None, tenant: str = None) -> list:
+    """Return all aspect names of the taxonomy (or tenant)."""
+    return list(get_matcher(taxonomy, tenant).aspects)
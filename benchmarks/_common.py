@@ -0,0 +1,60 @@
+"""
+_common.py
+----------
+Shared helpers for the benchmark scripts in this directory.
+Run any benchmark from the repository root, e.g.
+`python benchmarks/bench_import_time.py`.
+"""
+
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def measure(fn, repeat: int = 5) -> dict:
+    """Call fn() `repeat` times and return wall-clock timings in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return {
+        "best":   min(timings),
+        "median": statistics.median(timings),
+        "worst":  max(timings),
+    }
+
+
+def synthetic_corpus(n_rows: int, seed: int = 42) -> list:
+    """
+    Build a corpus of `n_rows` feedback texts by recombining TRAINING_DATA.
+    Vocabulary stays realistic and heavily repeated, like real exports.
+    """
+    from model_training import TRAINING_DATA
+
+    rng = random.Random(seed)
+    texts = [text for text, _ in TRAINING_DATA]
+    connectors = [" but ", " and ", ". ", ", however ", "; "]
+    corpus = []
+    for _ in range(n_rows):
+        first = rng.choice(texts)
+        if rng.random() < 0.5:
+            corpus.append(first + rng.choice(connectors) + rng.choice(texts).lower())
+        else:
+            corpus.append(first)
+    return corpus
+
+
+def report(title: str, rows: list):
+    """Print a small aligned table of (label, value) rows."""
+    print(f"\n{title}")
+    print("-" * len(title))
+    width = max(len(label) for label, _ in rows)
+    for label, value in rows:
+        print(f"  {label:<{width}}  {value}")
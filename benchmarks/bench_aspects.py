@@ -0,0 +1,138 @@
+"""
+bench_aspects.py
+----------------
+Benchmarks for aspect_extraction against the original per-keyword regex
+implementation, with a parity check before every timing.
+
+Usage:
+    python benchmarks/bench_aspects.py            # run everything
+    python benchmarks/bench_aspects.py matcher    # run one section
+"""
+
+import re
+import sys
+
+from _common import measure, report, synthetic_corpus
+
+import aspect_extraction as ae
+
+
+def legacy_extract_aspects(text: str) -> list:
+    """The original implementation: one re.search per keyword."""
+    text_lower = text.lower()
+    detected = []
+    for aspect, keywords in ae.ASPECT_KEYWORDS.items():
+        for keyword in keywords:
+            pattern = r'\b' + re.escape(keyword) + r'\b'
+            if re.search(pattern, text_lower):
+                if aspect not in detected:
+                    detected.append(aspect)
+                break
+    return detected if detected else ["General"]
+
+
+EDGE_CASES = [
+    "", "General praise only", "AIR CONDITIONING is broken", "air-conditioning", "air  conditioning",
+    "labs, lab's and the e-library", "classroom vs class", "subject knowledge", "Wi-Fi wifi WIFI",
+    "the campus drive was good", "ac", "AC/DC", "hodgepodge", "mnc-level ctc of 12 lpa",
+]
+
+
+def bench_matcher(n_rows: int = 20_000):
+    """extract_aspects: compiled single-pass matcher versus per-keyword regex."""
+    corpus = EDGE_CASES + synthetic_corpus(n_rows)
+    for text in corpus:
+        if ae.extract_aspects(text) != legacy_extract_aspects(text):
+            raise AssertionError(f"aspect mismatch on {text!r}")
+
+    before = measure(lambda: [legacy_extract_aspects(t) for t in corpus])["median"]
+    after = measure(lambda: [ae.extract_aspects(t) for t in corpus])["median"]
+    report(f"extract_aspects over {len(corpus):,} texts", [
+        ("parity", "identical"),
+        ("per-keyword re.search", f"{before / len(corpus) * 1e6:7.1f} us/text"),
+        ("compiled matcher", f"{after / len(corpus) * 1e6:7.1f} us/text  ({before / after:.1f}x)"),
+    ])
+
+
+def legacy_split_into_clauses(text: str) -> list:
+    parts = re.split(
+        r'[;]|\b(?:but|however|although|though|yet|despite|whereas|while|except|nevertheless|nonetheless|on the other hand|that said|even so)\b',
+        text, flags=re.I
+    )
+    result = []
+    for p in parts:
+        p = p.strip().strip(',').strip()
+        if p and len(p.split()) >= 3:
+            result.append(p)
+    return result if result else [text]
+
+
+def legacy_map_aspects_to_clauses(text: str) -> tuple:
+    """The original analyze_feedback loop: aspects x clauses x keywords."""
+    clauses = legacy_split_into_clauses(text)
+    all_aspects = legacy_extract_aspects(text)
+    aspect_clause_map = {}
+    for aspect in all_aspects:
+        keywords = ae.ASPECT_KEYWORDS.get(aspect, [])
+        best_clause = text
+        for clause in clauses:
+            for kw in keywords:
+                if re.search(r'\b' + re.escape(kw) + r'\b', clause, re.I):
+                    best_clause = clause
+                    break
+        aspect_clause_map[aspect] = best_clause
+    return all_aspects, aspect_clause_map
+
+
+def bench_spans(n_rows: int = 20_000):
+    """Clause assignment in analyze_feedback: match offsets versus rescanning."""
+    import prediction
+
+    corpus = EDGE_CASES + synthetic_corpus(n_rows) + [
+        " , but ;; however the lab is , , fine but yet", "Faculty ok; labs bad; fees high; placements good",
+    ]
+    for text in corpus:
+        if prediction.split_into_clauses(text) != legacy_split_into_clauses(text):
+            raise AssertionError(f"clause mismatch on {text!r}")
+        if prediction.map_aspects_to_clauses(text) != legacy_map_aspects_to_clauses(text):
+            raise AssertionError(f"clause assignment mismatch on {text!r}")
+
+    multi = [t for t in corpus if len(legacy_extract_aspects(t)) >= 2]
+    before = measure(lambda: [legacy_map_aspects_to_clauses(t) for t in multi])["median"]
+    after = measure(lambda: [prediction.map_aspects_to_clauses(t) for t in multi])["median"]
+    report(f"Aspect -> clause assignment over {len(multi):,} multi-aspect texts", [
+        ("parity", f"identical on {len(corpus):,} texts"),
+        ("rescan clauses per keyword", f"{before / len(multi) * 1e6:7.1f} us/feedback"),
+        ("match spans", f"{after / len(multi) * 1e6:7.1f} us/feedback  ({before / after:.1f}x)"),
+    ])
+
+
+def bench_batch(n_rows: int = 200_000):
+    """Corpus-level sparse aspect detection versus one call per row."""
+    corpus = EDGE_CASES + synthetic_corpus(n_rows)
+    if ae.extract_aspects_batch(corpus) != [ae.extract_aspects(t) for t in corpus]:
+        raise AssertionError("extract_aspects_batch differs from extract_aspects")
+
+    legacy = measure(lambda: [legacy_extract_aspects(t) for t in corpus[:20_000]], repeat=1)["median"]
+    legacy *= len(corpus) / 20_000
+    per_row = measure(lambda: [ae.extract_aspects(t) for t in corpus], repeat=3)["median"]
+    batch = measure(lambda: ae.extract_aspects_batch(corpus), repeat=3)["median"]
+    report(f"Aspect detection over {len(corpus):,} rows", [
+        ("parity", "identical"),
+        ("original per-row (extrapolated)", f"{len(corpus) / legacy:10,.0f} rows/s"),
+        ("extract_aspects per row", f"{len(corpus) / per_row:10,.0f} rows/s"),
+        ("extract_aspects_batch", f"{len(corpus) / batch:10,.0f} rows/s  "
+                                  f"({legacy / batch:.0f}x original, {per_row / batch:.1f}x per-row)"),
+    ])
+
+
+BENCHMARKS = {
+    "matcher": bench_matcher,
+    "spans":   bench_spans,
+    "batch":   bench_batch,
+}
+
+
+if __name__ == "__main__":
+    for name in sys.argv[1:] or BENCHMARKS:
+        BENCHMARKS[name]()
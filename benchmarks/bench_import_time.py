@@ -0,0 +1,54 @@
+"""
+bench_import_time.py
+--------------------
+Cold-start benchmark: time to import the inference modules in a fresh
+interpreter, compared with the former download-on-import initialisation
+(importing NLTK and calling nltk.download for every resource).
+"""
+
+import subprocess
+import sys
+
+from _common import ROOT, report
+
+REPEAT = 5
+
+CASES = [
+    ("import data_preprocessing", "import data_preprocessing"),
+    ("import prediction",         "import prediction"),
+    ("import app",                "import app"),
+    ("legacy eager NLTK init",
+     "import nltk\n"
+     "for r in ['punkt', 'stopwords', 'wordnet', 'omw-1.4', 'averaged_perceptron_tagger', 'punkt_tab']:\n"
+     "    nltk.download(r, quiet=True)"),
+]
+
+TIMER = (
+    "import time, sys\n"
+    "start = time.perf_counter()\n"
+    "exec(sys.argv[1])\n"
+    "print(time.perf_counter() - start)\n"
+)
+
+
+def cold_import(code: str):
+    """Median seconds to run `code` in a fresh interpreter, or None on failure."""
+    timings = []
+    for _ in range(REPEAT):
+        proc = subprocess.run(
+            [sys.executable, "-c", TIMER, code],
+            cwd=ROOT, capture_output=True, text=True, timeout=300,
+        )
+        if proc.returncode != 0:
+            return None
+        timings.append(float(proc.stdout.strip().splitlines()[-1]))
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+if __name__ == "__main__":
+    rows = []
+    for label, code in CASES:
+        seconds = cold_import(code)
+        rows.append((label, "failed (dependency missing?)" if seconds is None else f"{seconds * 1000:8.1f} ms"))
+    report(f"Cold import time (median of {REPEAT} fresh interpreters)", rows)
@@ -0,0 +1,342 @@
+"""
+bench_pipeline.py
+-----------------
+Benchmarks for the end-to-end analyze_feedback / analyze_batch pipeline.
+Uses the saved model (training it first if model/ is missing), so the NLTK
+data must be installed.
+
+Usage:
+    python benchmarks/bench_pipeline.py           # run everything
+    python benchmarks/bench_pipeline.py memo      # run one section
+"""
+
+import os
+import sys
+import tempfile
+
+from _common import measure, report, synthetic_corpus
+
+import data_preprocessing as dp
+import prediction as pr
+
+
+class CallCounter:
+    """Proxy that counts calls to the wrapped object's inference methods."""
+
+    METHODS = ("transform", "predict", "predict_proba")
+
+    def __init__(self, wrapped):
+        self._wrapped = wrapped
+        self.calls = {}
+
+    def __getattr__(self, name):
+        attr = getattr(self._wrapped, name)
+        if name not in self.METHODS:
+            return attr
+
+        def counted(*args, **kwargs):
+            self.calls[name] = self.calls.get(name, 0) + 1
+            return attr(*args, **kwargs)
+        return counted
+
+
+def legacy_analyze_feedback(text: str, model, vectorizer) -> dict:
+    """analyze_feedback before the per-call memo: one prediction per aspect, plus the overall one."""
+    all_aspects, aspect_clause_map = pr.map_aspects_to_clauses(text)
+    aspect_results = []
+    for aspect in all_aspects:
+        sr = pr.predict_sentiment(aspect_clause_map[aspect], model, vectorizer)
+        aspect_results.append({
+            "aspect": aspect, "sentiment": sr["label"], "confidence": sr["confidence"],
+            "score": pr.SENTIMENT_SCORES.get(sr["label"], 0.0), "color": pr.SENTIMENT_COLORS[sr["label"]],
+            "emoji": pr.SENTIMENT_EMOJI[sr["label"]], "probabilities": sr["probabilities"],
+        })
+    overall_sr = pr.predict_sentiment(text, model, vectorizer)
+    overall_score = (pr.np.mean([r["score"] for r in aspect_results]) if aspect_results
+                     else pr.SENTIMENT_SCORES.get(overall_sr["label"], 0.0))
+    return {
+        "original_text": text, "processed_text": dp.preprocess(text), "aspects": all_aspects,
+        "sentiment": overall_sr["label"], "confidence": overall_sr["confidence"],
+        "overall_score": round(float(overall_score), 3), "probabilities": overall_sr["probabilities"],
+        "aspect_results": aspect_results, "color": pr.SENTIMENT_COLORS[overall_sr["label"]],
+        "emoji": pr.SENTIMENT_EMOJI[overall_sr["label"]],
+    }
+
+
+def bench_memo(n_rows: int = 2_000):
+    """analyze_feedback model calls and latency on multi-aspect feedback."""
+    model, vectorizer = pr.get_model_and_vectorizer()
+    corpus = [t for t in synthetic_corpus(n_rows * 4) if len(pr.map_aspects_to_clauses(t)[0]) > 1][:n_rows]
+    for text in corpus:
+        if pr.analyze_feedback(text, model, vectorizer) != legacy_analyze_feedback(text, model, vectorizer):
+            raise AssertionError(f"analyze_feedback output differs on {text!r}")
+
+    rows = [("parity", "identical")]
+    timings = {}
+    for name, analyze in (("before", legacy_analyze_feedback), ("after", pr.analyze_feedback)):
+        counted_model, counted_vectorizer = CallCounter(model), CallCounter(vectorizer)
+        for text in corpus:
+            analyze(text, counted_model, counted_vectorizer)
+        timings[name] = measure(lambda: [analyze(t, model, vectorizer) for t in corpus], repeat=3)["median"]
+        calls = {**counted_vectorizer.calls, **counted_model.calls}
+        rows.append((name, ", ".join(f"{k} {v / len(corpus):.2f}" for k, v in sorted(calls.items()))
+                     + f" calls/feedback, {timings[name] / len(corpus) * 1e3:.2f} ms/feedback"))
+    rows.append(("speed-up", f"{timings['before'] / timings['after']:.2f}x"))
+    report(f"analyze_feedback over {len(corpus):,} multi-aspect texts", rows)
+
+
+def bench_batch(n_rows: int = 10_000):
+    """analyze_batch (bulk preprocessing and scoring) versus analyze_feedback per row."""
+    model, vectorizer = pr.get_model_and_vectorizer()
+    corpus = synthetic_corpus(n_rows)
+    counted_model, counted_vectorizer = CallCounter(model), CallCounter(vectorizer)
+    batch = pr.analyze_batch(corpus, counted_model, counted_vectorizer)
+    if batch != [pr.analyze_feedback(t, model, vectorizer) for t in corpus]:
+        raise AssertionError("analyze_batch differs from analyze_feedback")
+
+    per_row = measure(lambda: [pr.analyze_feedback(t, model, vectorizer) for t in corpus], repeat=1)["median"]
+    batched = measure(lambda: pr.analyze_batch(corpus, model, vectorizer), repeat=3)["median"]
+    calls = {**counted_vectorizer.calls, **counted_model.calls}
+    report(f"Pipeline over {len(corpus):,} rows", [
+        ("parity", "identical"),
+        ("model calls per batch", ", ".join(f"{k} {v}" for k, v in sorted(calls.items()))),
+        ("analyze_feedback per row", f"{len(corpus) / per_row:8,.0f} rows/s"),
+        ("analyze_batch", f"{len(corpus) / batched:8,.0f} rows/s  ({per_row / batched:.1f}x)"),
+    ])
+
+
+def bench_parallel(n_rows: int = 20_000):
+    """analyze_batch throughput by worker count (forked workers share the model)."""
+    model, vectorizer = pr.get_model_and_vectorizer()
+    corpus = synthetic_corpus(n_rows)
+    serial = pr.analyze_batch(corpus, model, vectorizer)
+    cpus = os.cpu_count() or 1
+    rows = [("cores available", str(cpus))]
+    baseline = None
+    for n_jobs in sorted({1, 2, 4, cpus}):
+        if pr.analyze_batch(corpus, model, vectorizer, n_jobs=n_jobs) != serial:
+            raise AssertionError(f"n_jobs={n_jobs} output differs from the serial run")
+        elapsed = measure(lambda: pr.analyze_batch(corpus, model, vectorizer, n_jobs=n_jobs), repeat=3)["median"]
+        baseline = baseline or elapsed
+        rows.append((f"n_jobs={n_jobs}", f"{len(corpus) / elapsed:8,.0f} rows/s  ({baseline / elapsed:.2f}x)"))
+    rows.insert(1, ("parity", "identical, input order kept"))
+    report(f"analyze_batch scaling over {len(corpus):,} rows", rows)
+
+
+def bench_cache(n_rows: int = 10_000):
+    """analyze_batch with a ResultCache: cold run, then a re-upload of the same export."""
+    from result_cache import ResultCache
+
+    model, vectorizer = pr.get_model_and_vectorizer()
+    corpus = synthetic_corpus(n_rows)
+    expected = pr.analyze_batch(corpus, model, vectorizer)
+    cache = ResultCache()
+    if pr.analyze_batch(corpus, model, vectorizer, cache=cache) != expected:
+        raise AssertionError("cached analyze_batch differs on a cold cache")
+    cold = cache.stats()
+    if pr.analyze_batch(corpus, model, vectorizer, cache=cache) != expected:
+        raise AssertionError("cached analyze_batch differs on a warm cache")
+
+    uncached = measure(lambda: pr.analyze_batch(corpus, model, vectorizer), repeat=3)["median"]
+    warm = measure(lambda: pr.analyze_batch(corpus, model, vectorizer, cache=cache), repeat=3)["median"]
+    report(f"Result cache over {len(corpus):,} rows", [
+        ("parity", "identical"),
+        ("entries after cold run", f"{cold['entries']:,} ({cold['bytes'] / 2**20:.1f} MiB)"),
+        ("no cache", f"{len(corpus) / uncached:9,.0f} rows/s"),
+        ("warm cache", f"{len(corpus) / warm:9,.0f} rows/s  ({uncached / warm:.1f}x)"),
+    ])
+
+
+def bench_dedup(n_rows: int = 10_000, duplicate_share: float = 0.5):
+    """analyze_batch on an export where half the rows repeat others up to case or spacing."""
+    import random
+
+    model, vectorizer = pr.get_model_and_vectorizer()
+    distinct = list(dict.fromkeys(synthetic_corpus(n_rows * 4)))[:n_rows]
+    n_unique = int(n_rows * (1 - duplicate_share))
+    rng = random.Random(0)
+    # Spacing variants are not duplicates (whitespace can change the result)
+    variants = [str.lower, str.upper, lambda t: "  " + t.replace(" ", "\n", 1) + " ", lambda t: t]
+    corpus = distinct[:n_unique] + [rng.choice(variants)(rng.choice(distinct[:n_unique]))
+                                    for _ in range(n_rows - n_unique)]
+    corpus += ["Great teacher\nwhen he shows up to class", "Great teacher when he shows up to class"]
+    rng.shuffle(corpus)
+
+    results = pr.analyze_batch(corpus, model, vectorizer)
+    for text, result in zip(corpus, results):
+        if result != pr.analyze_feedback(text, model, vectorizer):
+            raise AssertionError(f"deduplicated result differs from a fresh analysis for {text!r}")
+    if len({id(r) for r in results}) != len(results):
+        raise AssertionError("rows share a result dict")
+
+    stats = pr.compute_summary_stats(results)
+    all_distinct = measure(lambda: pr.analyze_batch(distinct, model, vectorizer), repeat=3)["median"]
+    deduped = measure(lambda: pr.analyze_batch(corpus, model, vectorizer), repeat=3)["median"]
+    report(f"In-batch dedup over {len(corpus):,} rows", [
+        ("parity", "every row identical to analyze_feedback on it, own dict"),
+        ("unique / duplicates", f"{stats['unique']:,} / {stats['duplicate_pct']}%"),
+        ("all-distinct export", f"{len(distinct) / all_distinct:8,.0f} rows/s"),
+        ("duplicate-heavy export", f"{len(corpus) / deduped:8,.0f} rows/s  ({all_distinct / deduped:.1f}x)"),
+    ])
+
+
+def templated_corpus(n_rows: int, seed: int = 0) -> list:
+    """Feedback where most rows are punctuation or one-word edits of a smaller set of texts."""
+    import random
+
+    rng = random.Random(seed)
+    base = list(dict.fromkeys(synthetic_corpus(n_rows)))[:max(1, n_rows // 4)]
+    edits = [lambda t: t + "!!", lambda t: t.rstrip(".") + ".", str.lower,
+             lambda t: t.replace(" is ", " is really ", 1), lambda t: t]
+    return [rng.choice(edits)(rng.choice(base)) for _ in range(n_rows)]
+
+
+def bench_near(n_rows: int = 10_000, threshold: float = 0.8):
+    """MinHash/LSH clustering: scaling with corpus size, and analyze_batch with near-duplicates merged."""
+    rows = []
+    for size in (10_000, 100_000, 300_000):
+        corpus = synthetic_corpus(size)
+        elapsed = measure(lambda: pr.collapse_near_duplicate_feedback(corpus, threshold),
+                          repeat=1)["median"]
+        rows.append((f"clustering {size:,} rows", f"{elapsed:6.2f}s  ({elapsed / size * 1e6:.0f} µs/row)"))
+
+    model, vectorizer = pr.get_model_and_vectorizer()
+    # Pairs above the threshold whose analyses differ (negation, aspect,
+    # phrase, sarcasm): neither row may inherit the other's analysis
+    guarded = ["The faculty is very good and helpful to all students",
+               "The faculty is not very good and helpful to all students",
+               "Some good teachers but overall the experience has been disappointing",
+               "Some good teachers but overall the experience has been disappointing. does the job",
+               "The teacher explains well",
+               "The teachers explains well",
+               "the hostel food is great",
+               "the hostel fees is great",
+               "Great teacher\nwhen he shows up to class",
+               "Great teacher when he shows up to class"]
+    corpus = templated_corpus(n_rows) + guarded
+    unique, _ = pr.dedupe_texts(corpus)
+    representatives, index, stats = pr.collapse_near_duplicate_feedback(unique, threshold)
+    expected = pr.analyze_batch(representatives, model, vectorizer)
+    results = pr.analyze_batch(unique, model, vectorizer, near_duplicates=threshold)
+    for text, position, result in zip(unique, index, results):
+        own = {**expected[position], "original_text": text,
+               "processed_text": " ".join(dp.preprocess_tokens(text))}
+        if result != own:
+            raise AssertionError(f"near-duplicate fan-out differs for {text!r}")
+    for text, result in zip(unique[-len(guarded):], results[-len(guarded):]):
+        if result != pr.analyze_feedback(text, model, vectorizer):
+            raise AssertionError(f"{text!r} inherited another row's analysis")
+
+    exact = measure(lambda: pr.analyze_batch(corpus, model, vectorizer), repeat=3)["median"]
+    near = measure(lambda: pr.analyze_batch(corpus, model, vectorizer, near_duplicates=threshold), repeat=3)["median"]
+    rows += [
+        ("parity", "each row carries its representative's analysis and its own processed_text"),
+        ("guarded pairs", f"{len(guarded) // 2} kept apart, each row analysed on its own"),
+        ("templated export", f"{len(corpus):,} rows, {len(unique):,} distinct after exact dedup"),
+        ("clusters", f"{stats['clusters']:,} ({stats['multi_row_clusters']:,} multi-row, "
+                     f"largest {stats['largest_cluster']})"),
+        ("exact dedup only", f"{len(corpus) / exact:8,.0f} rows/s"),
+        (f"near_duplicates={threshold}", f"{len(corpus) / near:8,.0f} rows/s  ({exact / near:.1f}x)"),
+    ]
+    report(f"Near-duplicate collapsing (threshold {threshold})", rows)
+
+
+def bench_store(n_rows: int = 10_000):
+    """analyze_batch with a ResultStore: a new process re-analysing last week's export."""
+    from result_store import ResultStore
+
+    model, vectorizer = pr.get_model_and_vectorizer()
+    corpus = synthetic_corpus(n_rows)
+    expected = pr.analyze_batch(corpus, model, vectorizer)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "results.sqlite3")
+        first = ResultStore(path)
+        cold = measure(lambda: pr.analyze_batch(corpus, model, vectorizer, store=first), repeat=1)["median"]
+        first.close()
+
+        store = ResultStore(path)  # as a fresh session would open it
+        if pr.analyze_batch(corpus, model, vectorizer, store=store) != expected:
+            raise AssertionError("stored results differ from a fresh analysis")
+        warm = measure(lambda: pr.analyze_batch(corpus, model, vectorizer, store=store), repeat=3)["median"]
+        stats = store.stats()
+        stale = store.purge_stale("some-other-version")
+        store.close()
+    report(f"Result store over {len(corpus):,} rows", [
+        ("parity", "identical after a JSON round trip"),
+        ("stored", f"{stats['entries']:,} rows ({stats['bytes'] / 2**20:.1f} MiB)"),
+        ("first run (analyse + write)", f"{len(corpus) / cold:9,.0f} rows/s"),
+        ("re-upload (read)", f"{len(corpus) / warm:9,.0f} rows/s  ({cold / warm:.1f}x)"),
+        ("purge_stale on version change", f"{stale:,} rows removed"),
+    ])
+
+
+def percentile_latency(fn, inputs: list, q: float = 50) -> float:
+    """q-th percentile of fn(x) wall-clock time over `inputs`, in microseconds."""
+    import time
+
+    timings = []
+    for x in inputs:
+        start = time.perf_counter()
+        fn(x)
+        timings.append(time.perf_counter() - start)
+    return float(pr.np.percentile(timings, q)) * 1e6
+
+
+def bench_linear(n_rows: int = 2_000):
+    """Single-text ML latency: LinearSentimentScorer versus sklearn transform / predict / predict_proba."""
+    from linear_scorer import get_linear_scorer
+
+    model, vectorizer = pr.get_model_and_vectorizer()
+    scorer = get_linear_scorer(model, vectorizer)
+    if scorer is None:
+        raise SystemExit("saved model is not a TF-IDF + LogisticRegression pair")
+    corpus = list(dict.fromkeys(synthetic_corpus(n_rows * 2)))[:n_rows]
+    token_input = pr.uses_token_input(vectorizer)
+    inputs = [tokens if token_input else " ".join(tokens) for tokens in map(dp.preprocess_tokens, corpus)]
+
+    features = vectorizer.transform(inputs)
+    labels, proba = scorer.score(inputs)
+    max_diff = float(abs(proba - model.predict_proba(features)).max())
+    if max_diff > 1e-9 or (labels != model.predict(features)).any():
+        raise AssertionError(f"linear scorer differs from sklearn (max |Δp| {max_diff:.1e})")
+
+    def sklearn_scores(x):
+        features = vectorizer.transform([x])
+        return model.predict(features), model.predict_proba(features)
+
+    ml_sklearn = percentile_latency(sklearn_scores, inputs)
+    ml_linear = percentile_latency(lambda x: scorer.score([x]), inputs)
+    end_to_end = {}
+    for enabled in (False, True):
+        pr.LINEAR_SCORING = enabled
+        end_to_end[enabled] = percentile_latency(lambda t: pr.predict_sentiment(t, model, vectorizer), corpus)
+    pr.LINEAR_SCORING = True
+
+    report(f"Single-text scoring, p50 over {len(corpus):,} texts", [
+        ("parity", f"labels identical, max |Δp| {max_diff:.1e}"),
+        ("ML step, sklearn", f"{ml_sklearn:7.0f} µs"),
+        ("ML step, LinearSentimentScorer", f"{ml_linear:7.0f} µs  ({ml_sklearn / ml_linear:.1f}x)"),
+        ("predict_sentiment, sklearn", f"{end_to_end[False]:7.0f} µs"),
+        ("predict_sentiment, linear", f"{end_to_end[True]:7.0f} µs  ({end_to_end[False] / end_to_end[True]:.1f}x)"),
+    ])
+
+
+BENCHMARKS = {
+    "memo":     bench_memo,
+    "batch":    bench_batch,
+    "parallel": bench_parallel,
+    "cache":    bench_cache,
+    "dedup":    bench_dedup,
+    "near":     bench_near,
+    "store":    bench_store,
+    "linear":   bench_linear,
+}
+
+
+if __name__ == "__main__":
+    try:
+        dp.ensure_nltk_resources()
+    except dp.NLTKResourceError as e:
+        sys.exit(str(e))
+    for name in sys.argv[1:] or BENCHMARKS:
+        BENCHMARKS[name]()
@@ -0,0 +1,204 @@
+"""
+bench_preprocessing.py
+----------------------
+Throughput benchmarks for data_preprocessing. Requires the NLTK data
+(`python data_preprocessing.py --download`).
+
+Usage:
+    python benchmarks/bench_preprocessing.py            # run everything
+    python benchmarks/bench_preprocessing.py lemma      # run one section
+"""
+
+import random
+import sys
+import time
+import tracemalloc
+
+from _common import measure, report, synthetic_corpus
+
+import data_preprocessing as dp
+
+
+def bench_lemma_cache(n_rows: int = 100_000):
+    """Batch preprocessing with and without the shared lemma cache."""
+    corpus = synthetic_corpus(n_rows)
+    lemmatizer = dp.get_lemmatizer()
+    token_lists = [dp._clean_tokens(t) for t in corpus]
+
+    def uncached():
+        for tokens in token_lists:
+            [lemmatizer.lemmatize(tok) for tok in tokens]
+
+    def cached():
+        dp.clear_lemma_cache()
+        for tokens in token_lists:
+            dp.lemmatize_tokens(tokens)
+
+    before = measure(uncached, repeat=3)["median"]
+    after = measure(cached, repeat=3)["median"]
+    info = dp.lemma_cache_info()
+    report(f"Lemmatization over {n_rows:,} rows", [
+        ("WordNet per token", f"{before:7.2f} s"),
+        ("shared lemma cache", f"{after:7.2f} s  ({before / after:.1f}x)"),
+        ("cache hits / misses", f"{info['hits']:,} / {info['misses']:,}"),
+    ])
+
+
+def _cleaned(text: str) -> str:
+    return dp.remove_special_characters(dp.remove_punctuation(dp.lowercase_text(text)))
+
+
+def check_tokenizer_parity(n_rows: int = 50_000) -> int:
+    """
+    Assert that the fast and NLTK tokenizers agree on cleaned text from
+    TRAINING_DATA, a synthetic corpus and random word soup that includes
+    every Treebank contraction split. Returns the number of documents checked.
+    """
+    from model_training import TRAINING_DATA
+
+    rng = random.Random(7)
+    vocab = sorted({w for t, _ in TRAINING_DATA for w in _cleaned(t).split()})
+    vocab += list(dp.TREEBANK_SPLITS) + ["wannabe", "cannon", "gotten", "gonnaa"]
+    soup = [" ".join(rng.choice(vocab) for _ in range(rng.randint(0, 40)))
+            + rng.choice(["", " ", "\n", "\t "]) for _ in range(5_000)]
+
+    docs = [t for t, _ in TRAINING_DATA] + synthetic_corpus(n_rows) + soup
+    for doc in docs:
+        cleaned = _cleaned(doc)
+        fast, slow = dp.tokenize(cleaned, 'fast'), dp.tokenize(cleaned, 'nltk')
+        if fast != slow:
+            raise AssertionError(f"tokenizer mismatch on {doc!r}: {fast} != {slow}")
+    return len(docs)
+
+
+def bench_tokenizer(n_rows: int = 20_000):
+    """Per-document tokenization latency of the fast and NLTK modes."""
+    checked = check_tokenizer_parity()
+    cleaned = [_cleaned(t) for t in synthetic_corpus(n_rows)]
+    rows = [("parity", f"identical on {checked:,} documents")]
+    timings = {}
+    for mode in dp.TOKENIZERS:
+        start = time.perf_counter()
+        for doc in cleaned:
+            dp.tokenize(doc, mode)
+        timings[mode] = (time.perf_counter() - start) / n_rows
+    for mode in dp.TOKENIZERS:
+        speedup = timings['nltk'] / timings[mode]
+        rows.append((f"{mode} tokenizer", f"{timings[mode] * 1e6:8.2f} us/doc  ({speedup:.1f}x)"))
+    report(f"Tokenization over {n_rows:,} cleaned documents", rows)
+
+
+def check_normalize_parity() -> int:
+    """Assert normalize_text matches the three-step chain on every code point."""
+    chars = [chr(i) for i in range(0x110000) if not 0xD800 <= i < 0xE000]
+    samples = chars + ["Ab" + c + "Z " for c in chars] + synthetic_corpus(20_000)
+    for text in samples:
+        if dp.normalize_text(text) != _cleaned(text):
+            raise AssertionError(f"normalize_text mismatch on {text!r}")
+    return len(samples)
+
+
+def bench_normalize(n_rows: int = 100_000):
+    """Fused single-pass normalisation versus the three-step chain."""
+    checked = check_normalize_parity()
+    corpus = synthetic_corpus(n_rows)
+
+    def chain():
+        for text in corpus:
+            _cleaned(text)
+
+    def fused():
+        for text in corpus:
+            dp.normalize_text(text)
+
+    before = measure(chain)["median"]
+    after = measure(fused)["median"]
+    report(f"Normalisation over {n_rows:,} rows", [
+        ("parity", f"identical on {checked:,} inputs"),
+        ("lowercase/punct/regex", f"{before / n_rows * 1e6:6.2f} us/doc"),
+        ("normalize_text", f"{after / n_rows * 1e6:6.2f} us/doc  ({before / after:.1f}x)"),
+    ])
+
+
+def bench_parallel(n_rows: int = 100_000, workers: tuple = (1, 2, 4, 8)):
+    """preprocess_batch scaling across process-pool sizes."""
+    corpus = synthetic_corpus(n_rows)
+    expected = dp.preprocess_batch(corpus[:2_000])
+    rows = []
+    baseline = None
+    for n_jobs in workers:
+        if dp.preprocess_batch(corpus[:2_000], n_jobs=n_jobs) != expected:
+            raise AssertionError(f"n_jobs={n_jobs} changed the output")
+        dp.clear_lemma_cache()
+        seconds = measure(lambda: dp.preprocess_batch(corpus, n_jobs=n_jobs), repeat=3)["median"]
+        baseline = baseline or seconds
+        rows.append((f"n_jobs={n_jobs}", f"{seconds:7.2f} s  {n_rows / seconds:10,.0f} docs/s  ({baseline / seconds:.1f}x)"))
+    report(f"preprocess_batch over {n_rows:,} rows", rows)
+
+
+def bench_stream(n_rows: int = 200_000, n_jobs: int = 2):
+    """Peak parent-process memory of preprocess_batch versus preprocess_stream."""
+    texts = synthetic_corpus(1_000)
+
+    def source():
+        for i in range(n_rows):
+            yield texts[i % len(texts)]
+
+    rows = []
+    for label, run in [
+        ("preprocess_batch(list)", lambda: dp.preprocess_batch(list(source()), n_jobs=n_jobs)),
+        ("preprocess_stream(generator)", lambda: sum(1 for _ in dp.preprocess_stream(source(), n_jobs=n_jobs))),
+    ]:
+        tracemalloc.start()
+        start = time.perf_counter()
+        run()
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        rows.append((label, f"{seconds:6.2f} s  peak {peak / 2**20:8.1f} MiB"))
+    report(f"{n_rows:,} rows with n_jobs={n_jobs}", rows)
+
+
+def bench_handoff(n_rows: int = 50_000):
+    """Vectorizer input: joined strings (re-tokenized) versus token lists."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    import model_training as mt
+
+    token_lists = dp.preprocess_batch(synthetic_corpus(n_rows), as_tokens=True)
+    joined = [' '.join(tokens) for tokens in token_lists]
+    by_string = TfidfVectorizer(max_features=10000, ngram_range=mt.NGRAM_RANGE, sublinear_tf=True,
+                                token_pattern=mt.TOKEN_PATTERN, strip_accents='unicode').fit(joined)
+    by_tokens = TfidfVectorizer(max_features=10000, sublinear_tf=True,
+                                analyzer=mt.analyze_tokens).fit(token_lists)
+    if by_string.vocabulary_ != by_tokens.vocabulary_ or \
+            (by_string.transform(joined) != by_tokens.transform(token_lists)).nnz:
+        raise AssertionError("token-list analyzer does not match the string analyzer")
+
+    # Per-document calls, as predict_sentiment makes them
+    sample = list(zip(joined, token_lists))[:5_000]
+    before = measure(lambda: [by_string.transform([' '.join(t)]) for _, t in sample])["median"]
+    after = measure(lambda: [by_tokens.transform([t]) for _, t in sample])["median"]
+    report(f"Vectorizer handoff ({len(sample):,} single-document transforms)", [
+        ("parity", f"identical vocabulary and matrix on {n_rows:,} rows"),
+        ("join + token_pattern", f"{before / len(sample) * 1e6:7.1f} us/doc"),
+        ("token lists", f"{after / len(sample) * 1e6:7.1f} us/doc  (saves {(before - after) / len(sample) * 1e6:.1f} us/doc)"),
+    ])
+
+
+BENCHMARKS = {
+    "lemma":     bench_lemma_cache,
+    "tokenizer": bench_tokenizer,
+    "normalize": bench_normalize,
+    "parallel":  bench_parallel,
+    "stream":    bench_stream,
+    "handoff":   bench_handoff,
+}
+
+
+if __name__ == "__main__":
+    try:
+        dp.ensure_nltk_resources()
+    except dp.NLTKResourceError as e:
+        sys.exit(str(e))
+    for name in sys.argv[1:] or BENCHMARKS:
+        BENCHMARKS[name]()
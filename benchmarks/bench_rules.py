@@ -0,0 +1,286 @@
+"""
+bench_rules.py
+--------------
+Benchmarks for the rule-based signals in prediction (phrase dictionaries,
+sarcasm, lexicon counts) against their original implementations, with a
+parity check before every timing.
+
+Usage:
+    python benchmarks/bench_rules.py            # run everything
+    python benchmarks/bench_rules.py phrases    # run one section
+"""
+
+import re
+import sys
+
+from _common import measure, report, synthetic_corpus
+
+import prediction as pr
+
+
+def legacy_check_phrases(text: str):
+    """The original implementation: one substring test per phrase."""
+    t = text.lower()
+    for phrase in pr.NEGATIVE_PHRASES:
+        if phrase in t:
+            return "Negative"
+    for phrase in pr.POSITIVE_PHRASES:
+        if phrase in t and phrase not in pr.NEUTRAL_PHRASES:
+            return "Positive"
+    for phrase in pr.NEUTRAL_PHRASES:
+        if phrase in t:
+            return "Neutral"
+    return None
+
+
+PHRASE_EDGE_CASES = [
+    "", "NOT BAD at all", "not bad not great", "not good", "not goodness", "so so", "very goodwill",
+    "it was not too bad", "the wifi doesn't work and labs don't work", "works well, works sometimes",
+    "highly recommendable", "nothing special but very good", "inconsistently decent",
+]
+
+
+def bench_phrases(n_rows: int = 20_000):
+    """check_phrases: single-pass phrase automaton versus per-phrase substring scans."""
+    corpus = PHRASE_EDGE_CASES + synthetic_corpus(n_rows)
+    for text in corpus:
+        if pr.check_phrases(text) != legacy_check_phrases(text):
+            raise AssertionError(f"phrase label mismatch on {text!r}")
+        label, matched = pr.check_phrases(text, return_matches=True)
+        every = {p for p in pr.PHRASE_MATCHER.phrases if p in text.lower()}
+        if matched != every:
+            raise AssertionError(f"matched phrases differ on {text!r}")
+
+    before = measure(lambda: [legacy_check_phrases(t) for t in corpus])["median"]
+    after = measure(lambda: [pr.check_phrases(t) for t in corpus])["median"]
+    report(f"check_phrases over {len(corpus):,} texts", [
+        ("parity", "identical labels, complete match sets"),
+        ("substring scan", f"{before / len(corpus) * 1e6:7.1f} us/text"),
+        ("phrase automaton", f"{after / len(corpus) * 1e6:7.1f} us/text  ({before / after:.1f}x)"),
+    ])
+
+
+LEGACY_SARCASM_PATTERNS = [
+    re.compile(r'\b(great|amazing|excellent|wonderful|fantastic|brilliant|superb|love|perfect)\b.{0,60}\b(when|if|except|unless|only if|after only|just|barely|never|no one|zero|nothing|broken|useless|pathetic|terrible|awful|horrible|waste)', re.I),
+    re.compile(r'\b(if your goal is|prepares you for|builds character|rich tradition of|consistently|teaches you patience|teaches you survival)\b', re.I),
+    re.compile(r'\b(belong in a museum|from the 90s|from the 1990s|stopped existing|do not exist|never use|never existed)\b', re.I),
+    re.compile(r'\b(question my life|life choices|destroying us|break.*spirit|feel.*hopeless|nostalgic for freedom|feel.*hopeless|expert at pretending|pretending to learn)\b', re.I),
+    re.compile(r'\b(replied after only|responded after|took a year|took months|after three months|after six months)\b', re.I),
+    re.compile(r'\b(counted the rejections|count the failures|measure the disappointments)\b', re.I),
+    re.compile(r'\b(only three|only two|only one).{0,30}\b(out of|from|among)\b', re.I),
+    re.compile(r'\bworks.{0,20}\b(exactly|only|for just|for about)\b.{0,20}\b(minute|second|hour|day|week)\b', re.I),
+    re.compile(r'\b(historically|historically speaking|in the sense that|in a way|technically)\b.{0,40}\b(nothing|no|never|hasn|haven|didn|don|can\'t|cannot)\b', re.I),
+]
+
+
+def legacy_detect_sarcasm(text: str) -> bool:
+    """The original implementation: nine searches, two of them unbounded."""
+    return any(p.search(text) for p in LEGACY_SARCASM_PATTERNS)
+
+
+SARCASM_EDGE_CASES = [
+    "Great wifi, when it works", "The labs prepares you for nothing", "Computers from the 90s",
+    "This course will break my spirit", "I feel so hopeless", "I FEEL HOPELESS", "they replied after only a month",
+    "only two out of fifty got placed", "the projector works for about a minute", "technically nothing was taught",
+    "Great faculty and wonderful labs", "breakfast spirits", "feel\nhopeless",
+]
+
+
+def bench_sarcasm(n_rows: int = 20_000):
+    """detect_sarcasm: one combined scan versus nine pattern searches."""
+    corpus = SARCASM_EDGE_CASES + synthetic_corpus(n_rows)
+    for text in corpus:
+        if pr.detect_sarcasm(text) != legacy_detect_sarcasm(text):
+            raise AssertionError(f"sarcasm mismatch on {text!r}")
+        fired = pr.detect_sarcasm(text, return_pattern=True)
+        if fired is not None and not pr.SARCASM_PATTERNS[fired].search(text):
+            raise AssertionError(f"reported pattern {fired} does not match {text!r}")
+
+    before = measure(lambda: [legacy_detect_sarcasm(t) for t in corpus])["median"]
+    after = measure(lambda: [pr.detect_sarcasm(t) for t in corpus])["median"]
+    report(f"detect_sarcasm over {len(corpus):,} texts", [
+        ("parity", "identical"),
+        ("nine searches", f"{before / len(corpus) * 1e6:7.1f} us/text"),
+        ("combined scan", f"{after / len(corpus) * 1e6:7.1f} us/text  ({before / after:.1f}x)"),
+    ])
+
+
+def bench_sarcasm_stress(sizes: tuple = (10_000, 25_000, 50_000, 100_000)):
+    """Latency on long pasted essays that nearly, but never, match 'break ... spirit'."""
+    unit = "I feel the labs break down every week and the staff never fix anything. "
+    rows = []
+    for size in sizes:
+        text = (unit * (size // len(unit) + 1))[:size]
+        after = measure(lambda: pr.detect_sarcasm(text), repeat=3)["median"]
+        before = measure(lambda: legacy_detect_sarcasm(text), repeat=1)["median"]
+        rows.append((f"{size:>7,} chars", f"combined {after * 1e3:7.1f} ms ({after / size * 1e9:5.0f} ns/char)"
+                                          f"   original {before * 1e3:8.1f} ms"))
+    report("detect_sarcasm on long inputs", rows)
+
+
+def legacy_detect_negation_context(text: str) -> str:
+    """The original walker: up to six set probes per token, single words only."""
+    tokens = re.findall(r"[\w']+", text.lower())
+    neg_score = pos_score = 0
+    negated, intensify = False, 1.0
+    for tok in tokens:
+        if tok in pr.NEGATION_WORDS:
+            negated, intensify = True, 1.0
+        elif tok in pr.INTENSIFIERS:
+            intensify = 1.5
+        elif tok in pr.DIMINISHERS:
+            intensify = 0.6
+        elif tok in pr.POSITIVE_WORDS:
+            if negated:
+                neg_score += intensify * 1.2
+            else:
+                pos_score += intensify
+            negated, intensify = False, 1.0
+        elif tok in pr.NEGATIVE_WORDS:
+            if negated:
+                pos_score += intensify * 0.7
+            else:
+                neg_score += intensify * 1.2
+            negated, intensify = False, 1.0
+        elif tok in pr.NEUTRAL_WORDS:
+            negated, intensify = False, 1.0
+    if neg_score == 0 and pos_score == 0:
+        return None
+    diff, total = pos_score - neg_score, pos_score + neg_score
+    if diff > 0.4 * total:
+        return "positive"
+    elif diff < -0.3 * total:
+        return "negative"
+    elif abs(diff) <= 0.3 * total and total > 0:
+        return "neutral"
+    return None
+
+
+def legacy_count_sentiment_words(text: str) -> tuple:
+    tokens = re.findall(r"[\w']+", text.lower())
+    return (sum(1 for t in tokens if t in pr.POSITIVE_WORDS),
+            sum(1 for t in tokens if t in pr.NEGATIVE_WORDS),
+            sum(1 for t in tokens if t in pr.NEUTRAL_WORDS))
+
+
+MULTIWORD_DIMINISHER_RE = re.compile(
+    r"(?<![\w'])(?:" + "|".join(re.escape(d) for d in pr.DIMINISHERS if " " in d) + r")(?![\w'])", re.I
+)
+
+LEXICON_EDGE_CASES = [
+    "the labs are a bit outdated", "teaching is kind of boring", "not a bit helpful", "fairly good",
+    "rather bad", "lacking support", "fair and decent", "a little slow at times", "sort of great",
+]
+
+# Multi-word diminishers used to be weighed as their last word; each entry
+# now applies its own weight. text -> (legacy hint, current hint)
+MULTIWORD_DIMINISHER_CASES = {
+    "a bit good but bad":       ("neutral", "negative"),
+    "kind of helpful but slow": ("neutral", "negative"),
+}
+
+
+def bench_lexicon(n_rows: int = 20_000):
+    """Negation walker and word counts: one lexicon lookup per token versus set probes."""
+    for text, (legacy_hint, hint) in MULTIWORD_DIMINISHER_CASES.items():
+        if (legacy_detect_negation_context(text), pr.detect_negation_context(text)) != (legacy_hint, hint):
+            raise AssertionError(f"expected {legacy_hint!r} -> {hint!r} on {text!r}")
+    corpus = LEXICON_EDGE_CASES + list(MULTIWORD_DIMINISHER_CASES) + synthetic_corpus(n_rows)
+    changed = 0
+    for text in corpus:
+        if pr.count_sentiment_words(text) != legacy_count_sentiment_words(text):
+            raise AssertionError(f"word counts differ on {text!r}")
+        if pr.detect_negation_context(text) != legacy_detect_negation_context(text):
+            if not MULTIWORD_DIMINISHER_RE.search(text):
+                raise AssertionError(f"negation hint differs on {text!r}")
+            changed += 1
+
+    def legacy():
+        for t in corpus:
+            legacy_detect_negation_context(t)
+            legacy_count_sentiment_words(t)
+
+    def lexicon():
+        for t in corpus:
+            doc = pr.FeedbackDoc(t)
+            pr.detect_negation_context(doc)
+            pr.count_sentiment_words(doc)
+
+    before = measure(legacy)["median"]
+    after = measure(lexicon)["median"]
+    report(f"Lexicon scoring over {len(corpus):,} texts", [
+        ("word counts", "identical"),
+        ("multi-word diminishers", f"{len(MULTIWORD_DIMINISHER_CASES)} cases neutral -> negative as expected"),
+        ("negation hints", f"identical except {changed} texts with multi-word diminishers"),
+        ("set probes", f"{before / len(corpus) * 1e6:7.1f} us/text"),
+        ("lexicon table", f"{after / len(corpus) * 1e6:7.1f} us/text  ({before / after:.1f}x)"),
+    ])
+
+
+def negated_counts(text: str) -> list:
+    """Reference for the negated-bigram columns: polar words right after a negator."""
+    tokens = re.findall(r"[\w']+", text.lower())
+    pos = neg = 0
+    for prev, tok in zip(tokens, tokens[1:]):
+        if prev in pr.NEGATION_WORDS:
+            pos += tok in pr.POSITIVE_WORDS
+            neg += tok in pr.NEGATIVE_WORDS
+    return [pos, neg]
+
+
+def bench_lexicon_batch(n_rows: int = 100_000):
+    """count_sentiment_words_batch: sparse document x term counts versus one call per row."""
+    corpus = LEXICON_EDGE_CASES + ["", "not good, never helpful", "x\x00good", "nothing  ...  good"] + synthetic_corpus(n_rows)
+    per_row = [list(pr.count_sentiment_words(t)) for t in corpus]
+    if pr.count_sentiment_words_batch(corpus).tolist() != per_row:
+        raise AssertionError("count_sentiment_words_batch differs from count_sentiment_words")
+    with_negation = pr.count_sentiment_words_batch(corpus, negation=True).tolist()
+    if with_negation != [row + negated_counts(t) for row, t in zip(per_row, corpus)]:
+        raise AssertionError("negated-bigram counts differ from the reference")
+
+    before = measure(lambda: [pr.count_sentiment_words(t) for t in corpus], repeat=3)["median"]
+    after = measure(lambda: pr.count_sentiment_words_batch(corpus), repeat=3)["median"]
+    negated = measure(lambda: pr.count_sentiment_words_batch(corpus, negation=True), repeat=3)["median"]
+    report(f"Lexicon counts over {len(corpus):,} texts", [
+        ("parity", "identical"),
+        ("count_sentiment_words per row", f"{len(corpus) / before:10,.0f} rows/s"),
+        ("batch", f"{len(corpus) / after:10,.0f} rows/s  ({before / after:.1f}x)"),
+        ("batch with negated bigrams", f"{len(corpus) / negated:10,.0f} rows/s"),
+    ])
+
+
+def rule_signals(text):
+    """The rule-layer calls predict_sentiment makes for one text or document."""
+    return (pr.detect_sarcasm(text), pr.check_phrases(text), pr.detect_negation_context(text),
+            pr.count_sentiment_words(text))
+
+
+def bench_document(n_rows: int = 20_000):
+    """Rule signals from plain strings versus one shared FeedbackDoc per text."""
+    corpus = PHRASE_EDGE_CASES + SARCASM_EDGE_CASES + synthetic_corpus(n_rows)
+    for text in corpus:
+        if rule_signals(text) != rule_signals(pr.FeedbackDoc(text)):
+            raise AssertionError(f"document signals differ on {text!r}")
+
+    before = measure(lambda: [rule_signals(t) for t in corpus])["median"]
+    after = measure(lambda: [rule_signals(pr.FeedbackDoc(t)) for t in corpus])["median"]
+    report(f"Rule signals over {len(corpus):,} texts", [
+        ("parity", "identical"),
+        ("string per stage", f"{before / len(corpus) * 1e6:7.1f} us/text"),
+        ("shared FeedbackDoc", f"{after / len(corpus) * 1e6:7.1f} us/text  ({before / after:.2f}x)"),
+    ])
+
+
+BENCHMARKS = {
+    "phrases":         bench_phrases,
+    "sarcasm":         bench_sarcasm,
+    "sarcasm_stress":  bench_sarcasm_stress,
+    "document":        bench_document,
+    "lexicon":         bench_lexicon,
+    "lexicon_batch":   bench_lexicon_batch,
+}
+
+
+if __name__ == "__main__":
+    for name in sys.argv[1:] or BENCHMARKS:
+        BENCHMARKS[name]()
@@ -4,34 +4,156 @@ data_preprocessing.py
 Handles all NLP preprocessing steps for student feedback text.
 Includes: lowercasing, punctuation removal, stopword removal,
 tokenization, and lemmatization.
+
+NLTK and its data are loaded lazily on first use and never downloaded
+implicitly. Install the data once with `python data_preprocessing.py --download`.
+
+Tokenizer modes (the `tokenizer` argument of preprocess):
+  - "fast": whitespace split with NLTK's contraction splits (default)
+  - "nltk": NLTK word_tokenize (needs the punkt_tab data)
+Both produce identical tokens on the cleaned text preprocess feeds them.
 """
 
+import json
+import math
+import os
 import re
 import string
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from nltk.stem import WordNetLemmatizer
-
-# Download required NLTK resources (run once)
-def download_nltk_resources():
-    """Download all required NLTK datasets."""
-    resources = ['punkt', 'stopwords', 'wordnet', 'omw-1.4', 'averaged_perceptron_tagger', 'punkt_tab']
-    for resource in resources:
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
+
+# NLTK data packages used by the pipeline, mapped to the resource paths
+# accepted by nltk.data.find(). A package is installed if any path exists.
+NLTK_RESOURCES = {
+    'stopwords': ('corpora/stopwords', 'corpora/stopwords.zip'),
+    'wordnet':   ('corpora/wordnet', 'corpora/wordnet.zip'),
+    'punkt_tab': ('tokenizers/punkt_tab', 'tokenizers/punkt'),
+}
+
+# Words NLTK's Treebank tokenizer splits even when no apostrophe is present
+TREEBANK_SPLITS = {
+    'cannot': ('can', 'not'), 'gimme': ('gim', 'me'), 'gonna': ('gon', 'na'),
+    'gotta': ('got', 'ta'), 'lemme': ('lem', 'me'), 'wanna': ('wan', 'na'),
+}
+
+TOKENIZERS = ('fast', 'nltk')
+
+# Precompiled tables for the normalisation steps
+_PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation)
+_NON_ALPHA_RE = re.compile(r'[^a-zA-Z\s]')
+
+# One-pass translation for ASCII input: uppercase -> lowercase, letters and
+# whitespace kept, everything else (punctuation, digits, symbols) deleted
+_NORMALIZE_TABLE = {
+    i: (chr(i).lower() if chr(i) in string.ascii_letters else None)
+    for i in range(128) if not chr(i).isspace()
+}
+
+# Keep negation words — they affect sentiment
+NEGATION_WORDS = {'no', 'not', 'never', 'neither', 'nor', 'hardly', 'barely', 'scarcely'}
+
+# Upper bound on distinct tokens held in the shared lemma cache
+LEMMA_CACHE_SIZE = 100_000
+
+# Loaded NLTK objects (stop words, lemmatizer, tokenizer), filled on first use
+_resources = None
+_resources_lock = threading.Lock()
+
+
+class NLTKResourceError(LookupError):
+    """Raised when NLTK data required for preprocessing is not installed."""
+
+
+def download_nltk_resources() -> list:
+    """
+    Download all required NLTK datasets. Needs network access.
+
+    Returns:
+        list: Packages that are still missing afterwards.
+    """
+    import nltk
+    for resource in NLTK_RESOURCES:
         try:
             nltk.download(resource, quiet=True)
         except Exception:
             pass
+    return missing_nltk_resources()
 
-download_nltk_resources()
 
-# Initialize lemmatizer and stopwords
-lemmatizer = WordNetLemmatizer()
-STOP_WORDS = set(stopwords.words('english'))
+def missing_nltk_resources() -> list:
+    """Return the required NLTK packages that are not found locally."""
+    import nltk
+    missing = []
+    for package, paths in NLTK_RESOURCES.items():
+        for path in paths:
+            try:
+                nltk.data.find(path)
+                break
+            except LookupError:
+                continue
+        else:
+            missing.append(package)
+    return missing
 
-# Keep negation words — they affect sentiment
-NEGATION_WORDS = {'no', 'not', 'never', 'neither', 'nor', 'hardly', 'barely', 'scarcely'}
-STOP_WORDS -= NEGATION_WORDS
+
+def ensure_nltk_resources(packages: tuple = None):
+    """Raise NLTKResourceError right away if any (or the given) NLTK data is missing."""
+    missing = [p for p in missing_nltk_resources() if packages is None or p in packages]
+    if missing:
+        raise NLTKResourceError(
+            f"Missing NLTK data: {', '.join(missing)}. "
+            f"Install it once with `python -m nltk.downloader {' '.join(missing)}` "
+            "or `python data_preprocessing.py --download` (requires network access)."
+        )
+
+
+def _load_resources() -> dict:
+    """Load stopwords and lemmatizer on first use (thread-safe)."""
+    global _resources
+    if _resources is None:
+        with _resources_lock:
+            if _resources is None:
+                ensure_nltk_resources(('stopwords', 'wordnet'))
+                from nltk.corpus import stopwords
+                from nltk.stem import WordNetLemmatizer
+
+                lemmatizer = WordNetLemmatizer()
+                lemmatizer.lemmatize('warmup')  # load WordNet while holding the lock
+                _resources = {
+                    'stop_words': set(stopwords.words('english')) - NEGATION_WORDS,
+                    'lemmatizer': lemmatizer,
+                }
+    return _resources
+
+
+@lru_cache(maxsize=None)
+def _word_tokenize():
+    """Return NLTK's word_tokenize once its Punkt data is known to exist."""
+    ensure_nltk_resources(('punkt_tab',))
+    from nltk.tokenize import word_tokenize
+    return word_tokenize
+
+
+def get_stop_words() -> set:
+    """Return the English stopword set (negation words excluded)."""
+    return _load_resources()['stop_words']
+
+
+def get_lemmatizer():
+    """Return the shared WordNet lemmatizer."""
+    return _load_resources()['lemmatizer']
+
+
+def __getattr__(name):
+    # Backwards compatibility for the former eagerly-initialised globals
+    if name == 'STOP_WORDS':
+        return get_stop_words()
+    if name == 'lemmatizer':
+        return get_lemmatizer()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def lowercase_text(text: str) -> str:
@@ -41,54 +163,251 @@ def lowercase_text(text: str) -> str:
 
 def remove_punctuation(text: str) -> str:
     """Remove all punctuation characters from text."""
-    return text.translate(str.maketrans('', '', string.punctuation))
+    return text.translate(_PUNCTUATION_TABLE)
 
 
 def remove_special_characters(text: str) -> str:
     """Remove numbers and special characters, keep only alphabetic words."""
-    return re.sub(r'[^a-zA-Z\s]', '', text)
+    return _NON_ALPHA_RE.sub('', text)
 
 
-def tokenize(text: str) -> list:
-    """Split text into individual word tokens."""
-    return word_tokenize(text)
+def normalize_text(text: str) -> str:
+    """
+    Lowercase and drop everything but ASCII letters and whitespace.
+    Same result as lowercase_text -> remove_punctuation ->
+    remove_special_characters, in a single translate() pass for ASCII text.
+    """
+    if text.isascii():
+        return text.translate(_NORMALIZE_TABLE)
+    return _NON_ALPHA_RE.sub('', text.lower())
+
+
+def tokenize(text: str, mode: str = 'fast') -> list:
+    """Split text into individual word tokens ('fast' by default, like preprocess)."""
+    if mode == 'fast':
+        return fast_tokenize(text)
+    if mode == 'nltk':
+        return _word_tokenize()(text)
+    raise ValueError(f"Unknown tokenizer {mode!r}; expected one of {TOKENIZERS}")
+
+
+def fast_tokenize(text: str) -> list:
+    """
+    Tokenize cleaned text (lowercase letters and whitespace only).
+    Matches word_tokenize on such input without Punkt or the Treebank regexes.
+    """
+    tokens = text.split()
+    if TREEBANK_SPLITS.keys().isdisjoint(tokens):
+        return tokens
+    return [part for token in tokens for part in TREEBANK_SPLITS.get(token, (token,))]
 
 
 def remove_stopwords(tokens: list) -> list:
     """Remove common stopwords while retaining negation words."""
-    return [token for token in tokens if token not in STOP_WORDS]
+    stop_words = get_stop_words()
+    return [token for token in tokens if token not in stop_words]
+
+
+# Optional precomputed token -> lemma table, consulted before the cache
+_lemma_table = {}
+
+
+@lru_cache(maxsize=LEMMA_CACHE_SIZE)
+def _cached_lemma(token: str) -> str:
+    return get_lemmatizer().lemmatize(token)
+
+
+def lemmatize(token: str) -> str:
+    """Return the lemma of a single token via the lemma table or shared cache."""
+    return _lemma_table.get(token) or _cached_lemma(token)
 
 
 def lemmatize_tokens(tokens: list) -> list:
     """Reduce each token to its base/lemma form."""
-    return [lemmatizer.lemmatize(token) for token in tokens]
+    table = _lemma_table
+    return [table.get(token) or _cached_lemma(token) for token in tokens]
+
+
+def lemma_cache_info() -> dict:
+    """
+    Return statistics for the shared lemma cache.
+    Lookups answered by a loaded lemma table do not touch the cache.
+    """
+    info = _cached_lemma.cache_info()
+    return {
+        "hits":       info.hits,
+        "misses":     info.misses,
+        "maxsize":    info.maxsize,
+        "currsize":   info.currsize,
+        "table_size": len(_lemma_table),
+    }
+
+
+def clear_lemma_cache():
+    """Empty the shared lemma cache and unload any lemma table."""
+    global _lemma_table
+    _cached_lemma.cache_clear()
+    _lemma_table = {}
+
+
+def build_lemma_table(texts: list, tokenizer: str = 'fast') -> dict:
+    """
+    Precompute lemmas for every token that survives stopword removal in `texts`.
+
+    Returns:
+        dict: token -> lemma mapping, suitable for save_lemma_table().
+    """
+    table = {}
+    for text in texts:
+        if isinstance(text, str):
+            for token in _clean_tokens(text, tokenizer):
+                if token not in table:
+                    table[token] = lemmatize(token)
+    return table
+
+
+def save_lemma_table(table: dict, path: str):
+    """Write a lemma table to a JSON file."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(table, f, ensure_ascii=False, sort_keys=True)
+
+
+def load_lemma_table(path: str) -> int:
+    """
+    Load a lemma table saved by save_lemma_table() and use it for all
+    subsequent lemmatization. Returns the number of entries loaded.
+    """
+    global _lemma_table
+    with open(path, 'r', encoding='utf-8') as f:
+        table = json.load(f)
+    _lemma_table = {str(k): str(v) for k, v in table.items() if v}
+    return len(_lemma_table)
+
+
+def _clean_tokens(text: str, tokenizer: str = 'fast') -> list:
+    """Steps 1-4 of the pipeline: normalised, tokenized, stopword-free tokens."""
+    tokens = tokenize(normalize_text(text), tokenizer)
+    return remove_stopwords(tokens)
 
 
-def preprocess(text: str) -> str:
+def preprocess_tokens(text: str, tokenizer: str = 'fast') -> list:
+    """
+    Full preprocessing pipeline, returning the cleaned token list.
+    Feeds vectorizers that take pre-tokenized input (see model_training.analyze_tokens).
+    """
+    if not isinstance(text, str) or not text.strip():
+        return []
+    return lemmatize_tokens(_clean_tokens(text, tokenizer))
+
+
+def preprocess(text: str, tokenizer: str = 'fast') -> str:
     """
     Full preprocessing pipeline.
     Returns a single cleaned string ready for feature extraction.
+    `tokenizer` selects the tokenizer mode ("fast" or "nltk"), see TOKENIZERS.
 
     Steps:
-    1. Lowercase
-    2. Remove punctuation & special chars
+    1. Lowercase                           } single pass
+    2. Remove punctuation & special chars  } (normalize_text)
     3. Tokenize
     4. Remove stopwords
     5. Lemmatize
     """
-    if not isinstance(text, str) or not text.strip():
-        return ""
+    return ' '.join(preprocess_tokens(text, tokenizer))
+
+
+def resolve_n_jobs(n_jobs: int) -> int:
+    """Translate an n_jobs value (-1 = all cores) into a worker count."""
+    cpus = os.cpu_count() or 1
+    if n_jobs is None or n_jobs == 0:
+        return 1
+    if n_jobs < 0:
+        return max(1, cpus + 1 + n_jobs)
+    return n_jobs
+
+
+def _init_worker(tokenizer: str, lemma_table: dict):
+    """Process-pool initializer: load NLTK resources once per worker."""
+    global _lemma_table
+    _lemma_table = lemma_table
+    _load_resources()
+    if tokenizer == 'nltk':
+        _word_tokenize()
+
 
-    text = lowercase_text(text)
-    text = remove_punctuation(text)
-    text = remove_special_characters(text)
-    tokens = tokenize(text)
-    tokens = remove_stopwords(tokens)
-    tokens = lemmatize_tokens(tokens)
+def _preprocess_chunk(texts: list, tokenizer: str, as_tokens: bool = False) -> list:
+    """Worker task: preprocess one chunk of texts."""
+    step = preprocess_tokens if as_tokens else preprocess
+    return [step(t, tokenizer) for t in texts]
 
-    return ' '.join(tokens)
 
+def preprocess_stream(source, tokenizer: str = 'fast', n_jobs: int = 1,
+                      chunksize: int = 512, max_pending: int = None, column=None,
+                      as_tokens: bool = False):
+    """
+    Lazily preprocess any iterable of texts (file handle, CSV reader, generator)
+    and yield the cleaned strings (token lists if `as_tokens`) in input order.
+
+    Parameters:
+        n_jobs (int): Worker processes to use; -1 uses every core.
+        chunksize (int): Texts read from `source` per worker task.
+        max_pending (int): Chunks allowed in flight at once (default 2 per
+            worker), which bounds memory regardless of the source size.
+        column: Field to take from each row, e.g. an index for csv.reader
+            rows or a key for csv.DictReader rows.
+    """
+    texts = iter(source) if column is None else (row[column] for row in source)
+    n_jobs = resolve_n_jobs(n_jobs)
+    if n_jobs <= 1:
+        step = preprocess_tokens if as_tokens else preprocess
+        for text in texts:
+            yield step(text, tokenizer)
+        return
+
+    # Load in the parent first: fails fast, and forked workers inherit WordNet
+    _load_resources()
+    max_pending = max_pending or 2 * n_jobs
+    chunks = iter(lambda: list(islice(texts, chunksize)), [])
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                             initargs=(tokenizer, _lemma_table)) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_preprocess_chunk, chunk, tokenizer, as_tokens))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def preprocess_batch(texts: list, tokenizer: str = 'fast', n_jobs: int = 1,
+                     chunksize: int = None, as_tokens: bool = False) -> list:
+    """
+    Apply preprocessing to a list of feedback texts.
+
+    Parameters:
+        n_jobs (int): Worker processes to use; -1 uses every core.
+        chunksize (int): Texts sent to a worker per task. Defaults to
+            splitting the batch into about four chunks per worker.
+        as_tokens (bool): Return token lists instead of joined strings.
+
+    Returns:
+        list: Cleaned strings (or token lists), in the same order as `texts`.
+    """
+    n_jobs = min(resolve_n_jobs(n_jobs), len(texts))
+    if n_jobs <= 1:
+        return _preprocess_chunk(texts, tokenizer, as_tokens)
+    if chunksize is None:
+        chunksize = math.ceil(len(texts) / (n_jobs * 4))
+    return list(preprocess_stream(texts, tokenizer, n_jobs, chunksize,
+                                  max_pending=n_jobs * 4, as_tokens=as_tokens))
+
+if __name__ == "__main__":
+    import sys
 
-def preprocess_batch(texts: list) -> list:
-    """Apply preprocessing to a list of feedback texts."""
-    return [preprocess(t) for t in texts]
+    if "--download" in sys.argv:
+        download_nltk_resources()
+    missing = missing_nltk_resources()
+    if missing:
+        print(f"Missing NLTK data: {', '.join(missing)} (run with --download)")
+        sys.exit(1)
+    print("All NLTK data is installed.")
@@ -0,0 +1,138 @@
+"""
+linear_scorer.py
+----------------
+Direct NumPy/SciPy inference for the TF-IDF + Logistic Regression model.
+The fitted vocabulary, IDF weights, coefficients and intercepts are read
+once; documents are then vectorised and scored in one pass, without the
+input validation sklearn repeats in every transform / predict /
+predict_proba call. Results match sklearn to floating-point rounding.
+"""
+
+import threading
+import weakref
+
+import numpy as np
+from scipy import sparse
+from scipy.special import expit
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+
+_scorers = weakref.WeakKeyDictionary()
+_scorers_lock = threading.Lock()
+
+
+class LinearSentimentScorer:
+    """
+    Scores documents with a fitted TfidfVectorizer and LogisticRegression.
+
+    Parameters:
+        model (LogisticRegression): Fitted classifier.
+        vectorizer (TfidfVectorizer): Fitted vectorizer the model was trained on.
+    """
+
+    def __init__(self, model, vectorizer):
+        self.classes_ = model.classes_
+        self.analyzer = vectorizer.build_analyzer()
+        self.vocabulary = vectorizer.vocabulary_
+        self.n_features = len(self.vocabulary)
+        self.dtype = vectorizer.dtype
+        self.binary = vectorizer.binary
+        self.sublinear_tf = vectorizer.sublinear_tf
+        self.idf = vectorizer.idf_ if vectorizer.use_idf else None
+        self.norm = vectorizer.norm
+        self.coef_t = np.ascontiguousarray(model.coef_.T)
+        self.intercept = model.intercept_
+        # Same choice as LogisticRegression.predict_proba: binary and
+        # one-vs-rest models use normalised sigmoids, multinomial softmax
+        multi_class = getattr(model, "multi_class", "auto")
+        self.ovr = (len(self.classes_) <= 2 or multi_class == "ovr"
+                    or (multi_class != "multinomial" and model.solver == "liblinear"))
+
+    @staticmethod
+    def supports(model, vectorizer) -> bool:
+        """True for a fitted TfidfVectorizer + LogisticRegression pair this class can reproduce."""
+        return (isinstance(vectorizer, TfidfVectorizer) and isinstance(model, LogisticRegression)
+                and hasattr(vectorizer, "vocabulary_") and hasattr(model, "coef_")
+                and (not vectorizer.use_idf or hasattr(vectorizer, "idf_"))
+                and vectorizer.norm in ("l1", "l2", None))
+
+    def features(self, documents: list) -> sparse.csr_matrix:
+        """TF-IDF matrix of `documents`, as vectorizer.transform(documents)."""
+        indptr, indices, counts = [0], [], []
+        vocabulary = self.vocabulary
+        for doc in documents:
+            row = {}
+            for gram in self.analyzer(doc):
+                j = vocabulary.get(gram)
+                if j is not None:
+                    row[j] = row.get(j, 0) + 1
+            indices.extend(row)
+            counts.extend(row.values())
+            indptr.append(len(indices))
+
+        indices = np.array(indices, dtype=np.int64)
+        data = np.array(counts, dtype=self.dtype)
+        if self.binary:
+            data.fill(1)
+        if self.sublinear_tf:
+            np.log(data, out=data)
+            data += 1
+        if self.idf is not None:
+            data *= self.idf[indices]
+        if self.norm is not None and len(data):
+            indptr = np.array(indptr)
+            row_ids = np.repeat(np.arange(len(documents)), np.diff(indptr))
+            values = data * data if self.norm == "l2" else np.abs(data)
+            norms = np.bincount(row_ids, weights=values, minlength=len(documents))
+            if self.norm == "l2":
+                norms = np.sqrt(norms)
+            norms[norms == 0] = 1
+            data /= norms[row_ids]
+        return sparse.csr_matrix((data, indices, indptr), shape=(len(documents), self.n_features))
+
+    def decision_function(self, documents: list) -> np.ndarray:
+        """Per-class scores, as model.decision_function(vectorizer.transform(documents))."""
+        scores = self.features(documents) @ self.coef_t + self.intercept
+        return scores.ravel() if scores.shape[1] == 1 else scores
+
+    def score(self, documents: list) -> tuple:
+        """
+        Predicted labels and class probabilities in one pass.
+
+        Returns:
+            tuple: (labels, probabilities) — as model.predict and
+            model.predict_proba on vectorizer.transform(documents).
+        """
+        scores = self.decision_function(documents)
+        if scores.ndim == 1:
+            labels = self.classes_[(scores > 0).astype(int)]
+            positive = expit(scores)
+            return labels, np.stack([1 - positive, positive], axis=1)
+
+        labels = self.classes_[scores.argmax(axis=1)]
+        if self.ovr:
+            proba = expit(scores)
+            totals = proba.sum(axis=1, keepdims=True)
+            proba = np.where(totals == 0, 1 / scores.shape[1], proba / np.where(totals == 0, 1, totals))
+        else:
+            proba = np.exp(scores - scores.max(axis=1, keepdims=True))
+            proba /= proba.sum(axis=1, keepdims=True)
+        return labels, proba
+
+
+def get_linear_scorer(model, vectorizer):
+    """
+    The LinearSentimentScorer for this model/vectorizer pair, built once per
+    pair; None when the pair is not a supported sklearn pipeline (callers
+    then use sklearn directly).
+    """
+    if not LinearSentimentScorer.supports(model, vectorizer):
+        return None
+    with _scorers_lock:
+        cached = _scorers.get(model)
+    if cached is not None and cached[0]() is vectorizer:
+        return cached[1]
+    scorer = LinearSentimentScorer(model, vectorizer)
+    with _scorers_lock:
+        _scorers[model] = (weakref.ref(vectorizer), scorer)
+    return scorer
@@ -10,9 +10,10 @@ Labels: Positive, Neutral, Negative
 
 import pickle
 import os
+import re
 import numpy as np
 from sklearn.linear_model import LogisticRegression
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import TfidfVectorizer, strip_accents_unicode
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, accuracy_score
 from data_preprocessing import preprocess_batch
@@ -913,6 +914,40 @@ TRAINING_DATA = [
 ]
 
 
+# Vectorizer token pattern and n-gram range (shared by both input modes)
+TOKEN_PATTERN = r"(?u)\b[a-zA-Z'][a-zA-Z']+\b"
+NGRAM_RANGE = (1, 3)
+_TOKEN_RE = re.compile(TOKEN_PATTERN)
+
+
+def analyze_tokens(tokens: list) -> list:
+    """
+    TfidfVectorizer analyzer for pre-tokenized documents (preprocess_tokens output).
+    Yields exactly the n-grams the word analyzer produces for ' '.join(tokens),
+    without re-running the token regex over the joined string.
+    """
+    words = []
+    for tok in tokens:
+        if tok.isascii() and tok.isalpha() and tok.islower():
+            if len(tok) > 1:
+                words.append(tok)
+        else:
+            words.extend(_TOKEN_RE.findall(strip_accents_unicode(tok.lower())))
+
+    # Same n-gram order as sklearn's VectorizerMixin._word_ngrams
+    min_n, max_n = NGRAM_RANGE
+    grams = list(words) if min_n == 1 else []
+    for n in range(max(min_n, 2), min(max_n, len(words)) + 1):
+        for i in range(len(words) - n + 1):
+            grams.append(' '.join(words[i:i + n]))
+    return grams
+
+
+def uses_token_input(vectorizer) -> bool:
+    """True if `vectorizer` was fitted on token lists (see analyze_tokens)."""
+    return getattr(vectorizer, 'analyzer', None) is analyze_tokens
+
+
 def prepare_dataset(data: list) -> tuple:
     """
     Extract texts and labels from the training dataset.
@@ -925,12 +960,15 @@ def prepare_dataset(data: list) -> tuple:
     return texts, labels
 
 
-def train_model(save_path: str = "model") -> dict:
+def train_model(save_path: str = "model", n_jobs: int = 1, pretokenized: bool = True) -> dict:
     """
     Train TF-IDF + Logistic Regression pipeline and save to disk.
 
     Parameters:
         save_path (str): Directory path to save model artifacts.
+        n_jobs (int): Worker processes for text preprocessing (-1 = all cores).
+        pretokenized (bool): Feed the vectorizer token lists through
+            analyze_tokens instead of joined strings it re-tokenizes.
 
     Returns:
         dict: Training metrics including accuracy and classification report.
@@ -942,7 +980,7 @@ def train_model(save_path: str = "model") -> dict:
 
     # Step 2: Preprocess texts
     print("Preprocessing training texts...")
-    processed_texts = preprocess_batch(texts)
+    processed_texts = preprocess_batch(texts, n_jobs=n_jobs, as_tokens=pretokenized)
 
     # Step 3: Split into train/test sets
     X_train, X_test, y_train, y_test = train_test_split(
@@ -954,16 +992,24 @@ def train_model(save_path: str = "model") -> dict:
 
     # Step 4: TF-IDF Vectorization
     print("Fitting TF-IDF vectorizer...")
-    vectorizer = TfidfVectorizer(
-        max_features=10000,
-        ngram_range=(1, 3),      # Unigrams + bigrams + trigrams
-        min_df=1,
-        sublinear_tf=True,       # Apply log normalization
-        analyzer='word',
-        token_pattern=r"(?u)\b[a-zA-Z'][a-zA-Z']+\b",  # Include contractions
-        strip_accents='unicode',
-        lowercase=True
-    )
+    if pretokenized:
+        vectorizer = TfidfVectorizer(
+            max_features=10000,
+            min_df=1,
+            sublinear_tf=True,       # Apply log normalization
+            analyzer=analyze_tokens  # Same token filter + 1-3 grams as below
+        )
+    else:
+        vectorizer = TfidfVectorizer(
+            max_features=10000,
+            ngram_range=NGRAM_RANGE,  # Unigrams + bigrams + trigrams
+            min_df=1,
+            sublinear_tf=True,        # Apply log normalization
+            analyzer='word',
+            token_pattern=TOKEN_PATTERN,  # Include contractions
+            strip_accents='unicode',
+            lowercase=True
+        )
     X_train_tfidf = vectorizer.fit_transform(X_train)
     X_test_tfidf = vectorizer.transform(X_test)
 
@@ -1028,6 +1074,10 @@ def load_model(model_path: str = "model/sentiment_model.pkl",
 
 
 if __name__ == "__main__":
-    # Run training when script is executed directly
-    metrics = train_model()
+    # Run training when script is executed directly. Train through the
+    # imported module, so the pickled vectorizer references
+    # model_training.analyze_tokens rather than __main__.analyze_tokens,
+    # which the app and prediction.py could not unpickle
+    import model_training
+    metrics = model_training.train_model()
     print(f"\nFinal Accuracy: {metrics['accuracy']:.2%}")
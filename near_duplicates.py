@@ -0,0 +1,183 @@
+"""
+near_duplicates.py
+------------------
+Near-duplicate detection for templated feedback ("Faculty is good." vs
+"faculty is good!!"). Texts are normalised, cut into character shingles
+and summarised by MinHash signatures; LSH banding proposes candidate
+pairs, which are kept only if their estimated Jaccard similarity reaches
+the threshold. Callers may pass a guard key per row (e.g. its detected
+aspects and the order of its negators and polarity words, see
+guard_sequences); rows with different keys never join, so "not very
+good" never joins "very good". Everything is vectorised with NumPy and
+runs in time roughly linear in the corpus size.
+"""
+
+import re
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+from phrase_matcher import DOC_SEPARATOR
+
+NEAR_DUPLICATE_THRESHOLD = 0.8
+
+_NON_WORD = re.compile(r"[^\w" + re.escape(DOC_SEPARATOR) + r"]+")
+_MASK32 = np.uint64(0xFFFFFFFF)
+
+
+def normalize_texts(texts: list) -> list:
+    """Lowercase, with every run of punctuation and whitespace turned into one space."""
+    joined = DOC_SEPARATOR.join(t.replace(DOC_SEPARATOR, " ") for t in texts)
+    return [t.strip() for t in _NON_WORD.sub(" ", joined.lower()).split(DOC_SEPARATOR)]
+
+
+def minhash_signatures(texts: list, num_perm: int = 128, shingle_size: int = 4,
+                       seed: int = 1, chunk_rows: int = 20_000) -> np.ndarray:
+    """
+    MinHash signatures of the character shingles of each normalised text.
+
+    Parameters:
+        texts (list): Texts as returned by normalize_texts.
+        num_perm (int): Hash functions per signature.
+        shingle_size (int): Characters per shingle; shorter texts are
+            padded, so they form a single shingle.
+        chunk_rows (int): Rows hashed at once, bounding peak memory.
+
+    Returns:
+        np.ndarray: (len(texts), num_perm) uint32 signatures.
+    """
+    rng = np.random.default_rng(seed)
+    # Multiply-shift hashing: (a * x + b) >> 32 with odd 64-bit a
+    a = rng.integers(1, 2**63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint32)
+
+    for lo in range(0, len(texts), chunk_rows):
+        chunk = [t.ljust(shingle_size) for t in texts[lo:lo + chunk_rows]]
+        codes = np.frombuffer(DOC_SEPARATOR.join(chunk).encode("utf-8"), dtype=np.uint8)
+        n_shingles = len(codes) - shingle_size + 1
+        # Polynomial hash of every window, wrapping mod 2**64
+        shingles = np.zeros(n_shingles, dtype=np.uint64)
+        for j in range(shingle_size):
+            shingles = shingles * np.uint64(257) + codes[j:j + n_shingles]
+        # Drop windows that span a document separator
+        is_sep = codes == ord(DOC_SEPARATOR)
+        seps_before = np.concatenate(([0], np.cumsum(is_sep)))
+        valid = seps_before[shingle_size:shingle_size + n_shingles] == seps_before[:n_shingles]
+        shingles = shingles[valid]
+        doc_ids = seps_before[:n_shingles][valid]
+        starts = np.flatnonzero(np.diff(doc_ids, prepend=-1))
+
+        for p in range(num_perm):
+            hashed = ((a[p] * shingles + b[p]) >> np.uint64(32)) & _MASK32
+            signatures[lo:lo + len(chunk), p] = np.minimum.reduceat(hashed, starts)
+    return signatures
+
+
+def lsh_parameters(threshold: float, num_perm: int) -> tuple:
+    """
+    (bands, rows) with bands * rows <= num_perm whose LSH threshold
+    (1 / bands) ** (1 / rows) is the highest one not above `threshold`,
+    so pairs at the threshold are very likely to become candidates.
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        estimate = (1 / bands) ** (1 / rows)
+        if estimate <= threshold and estimate > (1 / best[0]) ** (1 / best[1]):
+            best = (bands, rows)
+    return best
+
+
+def guard_sequences(texts: list, guard_words) -> list:
+    """
+    The guard words of each text, in order, as a tuple (usable in a guard
+    key). Texts and guard words are normalised alike ("isn't" guards "isn"
+    and "t").
+    """
+    guard = set(" ".join(normalize_texts(sorted(guard_words))).split())
+    return [tuple(w for w in t.split() if w in guard) for t in normalize_texts(texts)]
+
+
+def near_duplicate_clusters(texts: list, threshold: float = NEAR_DUPLICATE_THRESHOLD,
+                            num_perm: int = 128, shingle_size: int = 4, seed: int = 1,
+                            guard_keys: list = None) -> np.ndarray:
+    """
+    Group near-identical texts.
+
+    Parameters:
+        guard_keys (list): Optional hashable key per text; only texts with
+            equal keys can join a cluster.
+
+    Returns:
+        np.ndarray: For every row, the index of its cluster representative
+        (the cluster's first row; a row's own index if it has no near
+        duplicate). Every member's estimated Jaccard similarity to its
+        representative is at least `threshold`.
+    """
+    n = len(texts)
+    labels = np.arange(n)
+    if n < 2:
+        return labels
+    normalized = normalize_texts(texts)
+    signatures = minhash_signatures(normalized, num_perm, shingle_size, seed)
+    bands, rows = lsh_parameters(threshold, num_perm)
+    has_words = np.array([bool(t) for t in normalized])  # punctuation-only rows stay alone
+    guards = np.zeros(n, dtype=np.uint64)
+    if guard_keys is not None:
+        ids = {}
+        guards = np.array([ids.setdefault(key, len(ids)) for key in guard_keys], dtype=np.uint64)
+
+    # One 64-bit key per (row, band), salted with the guard key; a row
+    # links to the first row in its bucket
+    multipliers = np.random.default_rng(seed + 1).integers(1, 2**63, size=rows + 1, dtype=np.uint64) | np.uint64(1)
+    salt = guards * multipliers[rows]
+    sources, targets = [], []
+    for band in range(bands):
+        keys = signatures[:, band * rows:(band + 1) * rows].astype(np.uint64) @ multipliers[:rows] + salt
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        leader = first[inverse.ravel()]
+        linked = (leader != labels) & has_words & has_words[leader]
+        sources.append(labels[linked])
+        targets.append(leader[linked])
+    sources, targets = np.concatenate(sources), np.concatenate(targets)
+
+    # LSH only proposes candidates; keep the pairs that are actually similar
+    similarity = (signatures[sources] == signatures[targets]).mean(axis=1)
+    keep = (similarity >= threshold) & (guards[sources] == guards[targets])
+    graph = sparse.coo_matrix((np.ones(keep.sum()), (sources[keep], targets[keep])), shape=(n, n))
+    _, components = connected_components(graph, directed=False)
+    representative = np.full(components.max() + 1, n)
+    np.minimum.at(representative, components, labels)
+    labels = representative[components]
+
+    # Components chain through intermediate rows; members too far from the
+    # representative itself are split off on their own
+    too_far = (signatures == signatures[labels]).mean(axis=1) < threshold
+    labels[too_far] = np.flatnonzero(too_far)
+    return labels
+
+
+def collapse_near_duplicates(texts: list, threshold: float = NEAR_DUPLICATE_THRESHOLD, **kwargs) -> tuple:
+    """
+    Reduce `texts` to one representative per near-duplicate cluster.
+
+    Returns:
+        tuple: (representatives, index, stats) — representatives in input
+        order, for every row the position of its representative in that
+        list, and cluster statistics (rows, clusters, collapsed_rows,
+        multi_row_clusters, largest_cluster, threshold).
+    """
+    labels = near_duplicate_clusters(texts, threshold, **kwargs)
+    representatives, position = np.unique(labels, return_inverse=True)
+    sizes = np.bincount(position.ravel(), minlength=len(representatives))
+    stats = {
+        "rows":               len(texts),
+        "clusters":           len(representatives),
+        "collapsed_rows":     len(texts) - len(representatives),
+        "multi_row_clusters": int((sizes > 1).sum()),
+        "largest_cluster":    int(sizes.max()) if len(sizes) else 0,
+        "threshold":          threshold,
+    }
+    return [texts[i] for i in representatives], position.ravel().tolist(), stats
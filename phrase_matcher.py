@@ -0,0 +1,149 @@
+"""
+phrase_matcher.py
+-----------------
+Multi-phrase literal matching for keyword and phrase dictionaries.
+All phrases are compiled into one trie-shaped regular expression, so a
+single scan over the text reports every occurrence of every phrase,
+including overlapping and nested ones.
+"""
+
+import re
+from collections import namedtuple
+
+import numpy as np
+
+PhraseMatch = namedtuple("PhraseMatch", ["phrase", "start", "end"])
+
+# Joins documents for corpus-level matching; a non-word character, so \b
+# behaves at document edges exactly as at string edges
+DOC_SEPARATOR = "\x00"
+
+_WORD_CHAR = re.compile(r"\w")
+
+
+def trie_pattern(phrases: list) -> str:
+    """Build a regex alternation shaped like a trie, longest match first."""
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[""] = {}  # end-of-phrase marker
+
+    def build(node: dict) -> str:
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # A phrase ends here: make the longer continuations optional (greedy)
+        return "(?:" + body + ")?" if "" in node else body
+
+    return build(trie)
+
+
+class PhraseMatcher:
+    """
+    Finds all occurrences of a fixed set of phrases in one pass.
+
+    Parameters:
+        phrases (iterable): Literal phrases to look for.
+        whole_word (bool): Require \\b on both sides of a match, like
+            re.search(r'\\b' + re.escape(phrase) + r'\\b', text).
+        ignore_case (bool): Match case-insensitively (re.IGNORECASE).
+    """
+
+    def __init__(self, phrases, whole_word: bool = True, ignore_case: bool = False):
+        self.whole_word = whole_word
+        self.ignore_case = ignore_case
+        self.phrases = tuple(dict.fromkeys(p for p in phrases if p))
+
+        # Key the trie and lookups on the folded form when ignoring case
+        self._lookup = {self._fold(p): p for p in self.phrases}
+        body = trie_pattern(list(self._lookup))
+        if whole_word:
+            body = r"\b(?:" + body + r")\b"
+        # Zero-width lookahead: one attempt per position, so overlapping
+        # phrases starting at different positions are all reported
+        flags = re.I if ignore_case else 0
+        self._regex = re.compile("(?=(" + body + "))", flags)
+        # Corpus variant: document separators match as empty strings
+        self._corpus_regex = re.compile("(?=(" + body + "))|" + re.escape(DOC_SEPARATOR), flags)
+        self._phrase_index = {p: i for i, p in enumerate(self.phrases)}
+
+        # At a given position the regex reports the longest phrase; shorter
+        # phrases that are prefixes of it (and end on a valid boundary)
+        # match at the same position too
+        self._implied = {}
+        folded = list(self._lookup)
+        for longer in folded:
+            shorter = [
+                self._lookup[p] for p in folded
+                if len(p) < len(longer) and longer.startswith(p)
+                and (not whole_word or self._is_boundary(longer, len(p)))
+            ]
+            if shorter:
+                self._implied[longer] = shorter
+
+    def _fold(self, text: str) -> str:
+        return text.lower() if self.ignore_case else text
+
+    @staticmethod
+    def _is_boundary(text: str, i: int) -> bool:
+        return bool(_WORD_CHAR.match(text[i - 1])) != bool(_WORD_CHAR.match(text[i]))
+
+    def _resolve(self, matched: str) -> str:
+        """Map matched text back to its phrase (handles exotic case folds)."""
+        phrase = self._lookup.get(self._fold(matched))
+        if phrase is None:
+            phrase = next(p for p in self.phrases
+                          if re.fullmatch(re.escape(p), matched, re.I))
+        return phrase
+
+    def finditer(self, text: str):
+        """Yield a PhraseMatch for every phrase occurrence, ordered by start."""
+        for m in self._regex.finditer(text):
+            matched = m.group(1)
+            start = m.start()
+            phrase = self._resolve(matched)
+            yield PhraseMatch(phrase, start, start + len(matched))
+            for shorter in self._implied.get(self._fold(phrase), ()):
+                yield PhraseMatch(shorter, start, start + len(shorter))
+
+    def findall(self, text: str) -> set:
+        """Return the set of distinct phrases occurring in `text`."""
+        found = {self._resolve(matched) for matched in self._regex.findall(text)}
+        for phrase in [p for p in found if self._fold(p) in self._implied]:
+            found.update(self._implied[self._fold(phrase)])
+        return found
+
+    def document_hits(self, texts: list) -> tuple:
+        """
+        Match a whole corpus in one scan over the joined documents.
+
+        Returns:
+            tuple: (doc_ids, phrase_ids) integer arrays with one entry per
+            occurrence; phrase_ids index self.phrases.
+        """
+        joined = DOC_SEPARATOR.join(texts)
+        if joined.count(DOC_SEPARATOR) != max(len(texts) - 1, 0):
+            # A document contains the separator itself: keep document
+            # boundaries unambiguous; \x01 is also a non-word char
+            joined = DOC_SEPARATOR.join(t.replace(DOC_SEPARATOR, "\x01") for t in texts)
+        found = np.array(self._corpus_regex.findall(joined), dtype=str)
+        is_separator = found == ""
+        doc_ids = np.cumsum(is_separator)[~is_separator]
+        unique, inverse = np.unique(found[~is_separator], return_inverse=True)
+        phrases = [self._resolve(u) for u in unique]
+        phrase_ids = np.array([self._phrase_index[p] for p in phrases], dtype=np.int64)[inverse]
+
+        all_docs, all_ids = [doc_ids], [phrase_ids]
+        for u, phrase in enumerate(phrases):
+            for shorter in self._implied.get(self._fold(phrase), ()):
+                docs = doc_ids[inverse == u]
+                all_docs.append(docs)
+                all_ids.append(np.full(len(docs), self._phrase_index[shorter], dtype=np.int64))
+        return np.concatenate(all_docs), np.concatenate(all_ids)
+
+    def search(self, text: str) -> bool:
+        """True if any phrase occurs in `text`."""
+        return self._regex.search(text) is not None
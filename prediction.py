@@ -11,12 +11,25 @@ Significantly improved with:
   - Confidence-gated rule override
 """
 
+import hashlib
+import math
+import multiprocessing
 import os
 import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
 import numpy as np
-from data_preprocessing import preprocess
-from aspect_extraction import extract_aspects, ASPECT_KEYWORDS
-from model_training import load_model, train_model
+from scipy import sparse
+
+from data_preprocessing import get_lemmatizer, preprocess_tokens, resolve_n_jobs
+from aspect_extraction import get_matcher
+from linear_scorer import get_linear_scorer
+from model_training import load_model, train_model, uses_token_input
+from near_duplicates import collapse_near_duplicates, guard_sequences
+from phrase_matcher import DOC_SEPARATOR, PhraseMatcher, trie_pattern
+from result_cache import copy_result, model_version, normalize_key_text
 
 MODEL_PATH      = "model/sentiment_model.pkl"
 VECTORIZER_PATH = "model/tfidf_vectorizer.pkl"
@@ -97,6 +110,74 @@ DIMINISHERS = {
     "occasionally","at times","to some extent","in some ways","relatively"
 }
 
+INTENSIFIER_WEIGHT = 1.5
+DIMINISHER_WEIGHT  = 0.6
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# RULE LEXICON  (all word lists above, one lookup per token)
+# ═══════════════════════════════════════════════════════════════════════
+
+# Category bits; a token may carry several (e.g. "fair" is positive and neutral)
+LEX_POSITIVE    = 1
+LEX_NEGATIVE    = 2
+LEX_NEUTRAL     = 4
+LEX_NEGATION    = 8
+LEX_INTENSIFIER = 16
+LEX_DIMINISHER  = 32
+LEX_PHRASE      = 64   # first word of a multi-word entry ("a bit", "kind of")
+
+
+def build_lexicon() -> tuple:
+    """
+    Compile the word lists into one table.
+
+    Returns:
+        tuple: ({token: (category mask, modifier weight)},
+                {first word: [(remaining words, category mask, modifier weight), ...]
+                 longest first})
+    """
+    masks = {}
+    phrase_masks = {}
+    for words, bit in ((POSITIVE_WORDS, LEX_POSITIVE), (NEGATIVE_WORDS, LEX_NEGATIVE),
+                       (NEUTRAL_WORDS, LEX_NEUTRAL), (NEGATION_WORDS, LEX_NEGATION),
+                       (INTENSIFIERS, LEX_INTENSIFIER), (DIMINISHERS, LEX_DIMINISHER)):
+        for word in words:
+            parts = word.split()
+            if len(parts) > 1:
+                # The phrase keeps its own category; its first word is only flagged
+                phrase_masks[tuple(parts)] = phrase_masks.get(tuple(parts), 0) | bit
+                bit_here = LEX_PHRASE
+            else:
+                bit_here = bit
+            masks[parts[0]] = masks.get(parts[0], 0) | bit_here
+
+    lexicon = {token: (mask, lexicon_weight(mask)) for token, mask in masks.items()}
+    phrases = {}
+    for parts, mask in phrase_masks.items():
+        phrases.setdefault(parts[0], []).append((parts[1:], mask, lexicon_weight(mask)))
+    for entries in phrases.values():
+        entries.sort(key=lambda entry: len(entry[0]), reverse=True)
+    return lexicon, phrases
+
+
+def lexicon_weight(mask: int) -> float:
+    """Modifier weight of a lexicon category mask."""
+    # Intensifier takes precedence over diminisher, as in the walker
+    return (INTENSIFIER_WEIGHT if mask & LEX_INTENSIFIER else
+            DIMINISHER_WEIGHT if mask & LEX_DIMINISHER else 1.0)
+
+
+LEXICON, LEXICON_PHRASES = build_lexicon()
+NO_ENTRY = (0, 1.0)
+
+# Words near-duplicate feedback must share, in order, to be merged (see
+# collapse_near_duplicate_feedback): "not very good" is no duplicate of "very good"
+NEAR_DUPLICATE_GUARD_WORDS = frozenset(
+    part for words in (POSITIVE_WORDS, NEGATIVE_WORDS, NEUTRAL_WORDS, NEGATION_WORDS, INTENSIFIERS, DIMINISHERS)
+    for word in words for part in word.split()
+)
+
 
 # ═══════════════════════════════════════════════════════════════════════
 # PHRASE DICTIONARIES  (checked before ML model)
@@ -173,34 +254,130 @@ NEUTRAL_PHRASES = {
     "sometimes good sometimes bad","inconsistent","depends on"
 }
 
+# All three dictionaries in one automaton, matched as substrings of the
+# lowercased text; categories are resolved from the set of hits
+PHRASE_MATCHER = PhraseMatcher(sorted(NEGATIVE_PHRASES | POSITIVE_PHRASES | NEUTRAL_PHRASES), whole_word=False)
+
+# Upper bound on the gap in "break ... spirit"-style patterns: every pattern
+# then does bounded work per start position, so a scan is linear in the text
+SARCASM_MAX_GAP = 100
+
 # Sarcasm patterns — positive surface, negative meaning
-SARCASM_PATTERNS = [
-    re.compile(r'\b(great|amazing|excellent|wonderful|fantastic|brilliant|superb|love|perfect)\b.{0,60}\b(when|if|except|unless|only if|after only|just|barely|never|no one|zero|nothing|broken|useless|pathetic|terrible|awful|horrible|waste)', re.I),
-    re.compile(r'\b(if your goal is|prepares you for|builds character|rich tradition of|consistently|teaches you patience|teaches you survival)\b', re.I),
-    re.compile(r'\b(belong in a museum|from the 90s|from the 1990s|stopped existing|do not exist|never use|never existed)\b', re.I),
-    re.compile(r'\b(question my life|life choices|destroying us|break.*spirit|feel.*hopeless|nostalgic for freedom|feel.*hopeless|expert at pretending|pretending to learn)\b', re.I),
-    re.compile(r'\b(replied after only|responded after|took a year|took months|after three months|after six months)\b', re.I),
-    re.compile(r'\b(counted the rejections|count the failures|measure the disappointments)\b', re.I),
-    re.compile(r'\b(only three|only two|only one).{0,30}\b(out of|from|among)\b', re.I),
-    re.compile(r'\bworks.{0,20}\b(exactly|only|for just|for about)\b.{0,20}\b(minute|second|hour|day|week)\b', re.I),
-    re.compile(r'\b(historically|historically speaking|in the sense that|in a way|technically)\b.{0,40}\b(nothing|no|never|hasn|haven|didn|don|can\'t|cannot)\b', re.I),
-]
+SARCASM_PATTERNS = {
+    "praise_then_failure": re.compile(r'\b(great|amazing|excellent|wonderful|fantastic|brilliant|superb|love|perfect)\b.{0,60}\b(when|if|except|unless|only if|after only|just|barely|never|no one|zero|nothing|broken|useless|pathetic|terrible|awful|horrible|waste)', re.I),
+    "backhanded_praise":   re.compile(r'\b(if your goal is|prepares you for|builds character|rich tradition of|consistently|teaches you patience|teaches you survival)\b', re.I),
+    "obsolete":            re.compile(r'\b(belong in a museum|from the 90s|from the 1990s|stopped existing|do not exist|never use|never existed)\b', re.I),
+    "despair":             re.compile(rf'\b(question my life|life choices|destroying us|break.{{0,{SARCASM_MAX_GAP}}}spirit|feel.{{0,{SARCASM_MAX_GAP}}}hopeless|nostalgic for freedom|expert at pretending|pretending to learn)\b', re.I),
+    "slow_response":       re.compile(r'\b(replied after only|responded after|took a year|took months|after three months|after six months)\b', re.I),
+    "counting_failures":   re.compile(r'\b(counted the rejections|count the failures|measure the disappointments)\b', re.I),
+    "only_a_few":          re.compile(r'\b(only three|only two|only one).{0,30}\b(out of|from|among)\b', re.I),
+    "works_briefly":       re.compile(r'\bworks.{0,20}\b(exactly|only|for just|for about)\b.{0,20}\b(minute|second|hour|day|week)\b', re.I),
+    "technically_nothing": re.compile(r'\b(historically|historically speaking|in the sense that|in a way|technically)\b.{0,40}\b(nothing|no|never|hasn|haven|didn|don|can\'t|cannot)\b', re.I),
+}
+
+# One scan for all patterns; the named group that matched says which fired.
+# Every pattern starts with \b, which is tested once per position up front
+SARCASM_RE = re.compile(
+    r"\b(?:" + "|".join(f"(?P<{name}>{p.pattern[2:]})" for name, p in SARCASM_PATTERNS.items()) + ")",
+    re.I
+)
 
 CONTRAST_RE = re.compile(
     r'\b(but|however|although|though|yet|despite|unfortunately|sadly|except|while|whereas|on the other hand|that said|having said that|even so|in contrast|nevertheless|nonetheless)\b',
     re.I
 )
 
+# Content hash of every word list, phrase dictionary and pattern above; part
+# of pipeline_version() so stored results are invalidated when they change.
+# Bump RULES_VERSION when the decision logic itself changes
+RULES_VERSION = 1
+LEXICON_VERSION = hashlib.sha1(repr([
+    sorted(words) for words in (POSITIVE_WORDS, NEGATIVE_WORDS, NEUTRAL_WORDS, NEGATION_WORDS,
+                                INTENSIFIERS, DIMINISHERS, NEGATIVE_PHRASES, POSITIVE_PHRASES,
+                                NEUTRAL_PHRASES)
+] + [p.pattern for p in (*SARCASM_PATTERNS.values(), CONTRAST_RE)]).encode("utf-8")).hexdigest()[:16]
+
+
+WORD_RE = re.compile(r"[\w']+")
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# DOCUMENT
+# ═══════════════════════════════════════════════════════════════════════
+
+class FeedbackDoc:
+    """
+    One text with the forms every prediction stage needs, each computed at
+    most once: the lowercased text, its word tokens and their lexicon
+    entries, and the preprocessed tokens fed to the vectorizer. The rule helpers accept
+    either a plain string or a FeedbackDoc.
+    """
+
+    __slots__ = ("text", "lower", "scores", "_tokens", "_lexicon", "_counts", "_cleaned")
+
+    def __init__(self, text: str, cleaned: list = None, counts: tuple = None):
+        self.text     = text
+        self.lower    = text.lower()
+        self.scores   = None  # (label, probabilities) from score_docs, for one model
+        self._tokens  = None
+        self._lexicon = None
+        self._counts  = counts
+        self._cleaned = cleaned
+
+    @property
+    def tokens(self) -> list:
+        """Word tokens ([\\w']+) of the lowercased text."""
+        if self._tokens is None:
+            self._tokens = WORD_RE.findall(self.lower)
+        return self._tokens
+
+    @property
+    def lexicon(self) -> list:
+        """LEXICON entry (mask, weight) of each token: one lookup per token."""
+        if self._lexicon is None:
+            get = LEXICON.get
+            self._lexicon = [get(tok, NO_ENTRY) for tok in self.tokens]
+        return self._lexicon
+
+    @property
+    def counts(self) -> tuple:
+        """(pos, neg, neu) lexicon word counts, see count_sentiment_words."""
+        if self._counts is None:
+            pos = neg = neu = 0
+            for mask, _ in self.lexicon:
+                if mask:
+                    pos += mask & LEX_POSITIVE
+                    neg += mask & LEX_NEGATIVE
+                    neu += mask & LEX_NEUTRAL
+            self._counts = (pos, neg >> 1, neu >> 2)
+        return self._counts
+
+    @property
+    def cleaned(self) -> list:
+        """preprocess_tokens(text), the model input."""
+        if self._cleaned is None:
+            self._cleaned = preprocess_tokens(self.text)
+        return self._cleaned
+
+
+def as_doc(text) -> FeedbackDoc:
+    """Wrap a string in a FeedbackDoc; documents pass through unchanged."""
+    return text if isinstance(text, FeedbackDoc) else FeedbackDoc(text)
+
 
 # ═══════════════════════════════════════════════════════════════════════
 # CORE NLP HELPERS
 # ═══════════════════════════════════════════════════════════════════════
 
-def detect_sarcasm(text: str) -> bool:
-    for p in SARCASM_PATTERNS:
-        if p.search(text):
-            return True
-    return False
+def detect_sarcasm(text: str, return_pattern: bool = False):
+    """
+    True if any sarcasm pattern occurs in the text. With return_pattern=True
+    returns the name of the (leftmost) pattern that fired, or None.
+    """
+    m = SARCASM_RE.search(as_doc(text).text)
+    if return_pattern:
+        return m.lastgroup if m else None
+    return m is not None
 
 
 def detect_negation_context(text: str) -> str:
@@ -208,7 +385,9 @@ def detect_negation_context(text: str) -> str:
     Walk through tokens and detect negation + intensifier context.
     Returns adjusted sentiment hint: 'positive', 'negative', 'neutral', or None.
     """
-    tokens = re.findall(r"[\w']+", text.lower())
+    doc     = as_doc(text)
+    tokens  = doc.tokens
+    entries = doc.lexicon
     n = len(tokens)
 
     neg_score = 0
@@ -218,25 +397,26 @@ def detect_negation_context(text: str) -> str:
 
     i = 0
     while i < n:
-        tok = tokens[i]
-
-        if tok in NEGATION_WORDS:
+        mask, weight = entries[i]
+        length = 1
+        if mask & LEX_PHRASE:
+            # A multi-word entry counts as one token of its own category
+            phrase = match_lexicon_phrase(tokens, i)
+            if phrase:
+                length, mask, weight = phrase
+
+        if mask & LEX_NEGATION:
             negated  = True
             intensify = 1.0
-            i += 1
+            i += length
             continue
 
-        if tok in INTENSIFIERS:
-            intensify = 1.5
-            i += 1
+        if mask & (LEX_INTENSIFIER | LEX_DIMINISHER):
+            intensify = weight
+            i += length
             continue
 
-        if tok in DIMINISHERS:
-            intensify = 0.6
-            i += 1
-            continue
-
-        if tok in POSITIVE_WORDS:
+        if mask & LEX_POSITIVE:
             weight = intensify
             if negated:
                 neg_score += weight * 1.2   # negated positive = stronger negative signal
@@ -245,7 +425,7 @@ def detect_negation_context(text: str) -> str:
             negated   = False
             intensify = 1.0
 
-        elif tok in NEGATIVE_WORDS:
+        elif mask & LEX_NEGATIVE:
             weight = intensify
             if negated:
                 pos_score += weight * 0.7   # negated negative = weak positive signal
@@ -254,7 +434,7 @@ def detect_negation_context(text: str) -> str:
             negated   = False
             intensify = 1.0
 
-        elif tok in NEUTRAL_WORDS:
+        elif mask & LEX_NEUTRAL:
             negated   = False
             intensify = 1.0
 
@@ -262,7 +442,7 @@ def detect_negation_context(text: str) -> str:
         elif negated:
             pass  # keep negation active for compound phrases
 
-        i += 1
+        i += length
 
     if neg_score == 0 and pos_score == 0:
         return None
@@ -279,27 +459,41 @@ def detect_negation_context(text: str) -> str:
     return None
 
 
-def check_phrases(text: str):
+def match_lexicon_phrase(tokens: list, i: int):
+    """
+    The longest multi-word lexicon entry starting at tokens[i], as
+    (token length, category mask, modifier weight), or None.
+    """
+    for rest, mask, weight in LEXICON_PHRASES.get(tokens[i], ()):
+        if tuple(tokens[i + 1:i + 1 + len(rest)]) == rest:
+            return 1 + len(rest), mask, weight
+    return None
+
+
+def check_phrases(text: str, return_matches: bool = False):
     """
     Check multi-word phrase dictionaries.
     Returns 'Positive', 'Negative', 'Neutral', or None.
     Priority: Negative > Positive > Neutral
-    """
-    t = text.lower()
-
-    # Negative phrases have highest priority
-    for phrase in NEGATIVE_PHRASES:
-        if phrase in t:
-            return "Negative"
 
-    for phrase in POSITIVE_PHRASES:
-        if phrase in t and phrase not in NEUTRAL_PHRASES:
-            return "Positive"
+    With return_matches=True returns (label, matched) where `matched` is the
+    set of every dictionary phrase found in the text.
+    """
+    matched = PHRASE_MATCHER.findall(as_doc(text).lower)
+    label = phrase_label(matched)
+    return (label, matched) if return_matches else label
 
-    for phrase in NEUTRAL_PHRASES:
-        if phrase in t:
-            return "Neutral"
 
+def phrase_label(matched: set):
+    """Resolve a set of matched phrases to a label by dictionary priority."""
+    if not matched:
+        return None
+    if not NEGATIVE_PHRASES.isdisjoint(matched):
+        return "Negative"
+    if any(p in POSITIVE_PHRASES and p not in NEUTRAL_PHRASES for p in matched):
+        return "Positive"
+    if not NEUTRAL_PHRASES.isdisjoint(matched):
+        return "Neutral"
     return None
 
 
@@ -308,11 +502,88 @@ def count_sentiment_words(text: str):
     Count positive, negative, neutral words in text.
     Returns (pos, neg, neu) counts.
     """
-    tokens = re.findall(r"[\w']+", text.lower())
-    pos = sum(1 for t in tokens if t in POSITIVE_WORDS)
-    neg = sum(1 for t in tokens if t in NEGATIVE_WORDS)
-    neu = sum(1 for t in tokens if t in NEUTRAL_WORDS)
-    return pos, neg, neu
+    return as_doc(text).counts
+
+
+# Columns of count_sentiment_words_batch(..., negation=True)
+LEXICON_COUNT_COLUMNS = ("positive", "negative", "neutral", "negated_positive", "negated_negative")
+
+
+# Texts scanned per pass in count_sentiment_words_batch
+LEXICON_BATCH_SIZE = 10_000
+
+
+@lru_cache(maxsize=2)
+def _lexicon_scanner(negation: bool):
+    """
+    Regex finding every lexicon token of a joined corpus, as whole [\\w']+
+    tokens. With negation, group 1 also captures "negator polar-word" when
+    a polar word directly follows a negation word. Document separators
+    match as empty strings.
+    """
+    bits = LEX_POSITIVE | LEX_NEGATIVE | LEX_NEUTRAL | (LEX_NEGATION if negation else 0)
+    words = [tok for tok, (mask, _) in LEXICON.items() if mask & bits and WORD_RE.fullmatch(tok)]
+    pattern = "(" + trie_pattern(words) + ")"
+    if negation:
+        negators = [w for w in words if LEXICON[w][0] & LEX_NEGATION]
+        polar = [w for w in words if LEXICON[w][0] & (LEX_POSITIVE | LEX_NEGATIVE)]
+        gap = "[^\\w'" + re.escape(DOC_SEPARATOR) + "]+"  # never across documents
+        pattern = ("(?=(" + trie_pattern(negators) + gap + trie_pattern(polar)
+                   + ")(?![\\w']))?" + pattern)
+    return re.compile(r"(?<![\w'])" + pattern + r"(?![\w'])|" + re.escape(DOC_SEPARATOR))
+
+
+def _term_weights(term: str) -> list:
+    """Row of the term x LEXICON_COUNT_COLUMNS weight matrix."""
+    parts = re.split(r"[^\w']+", term)
+    mask = LEXICON[parts[-1]][0]
+    polarity = [mask & LEX_POSITIVE, (mask & LEX_NEGATIVE) >> 1]
+    if len(parts) > 1:
+        return [0, 0, 0, *polarity]  # negated bigram
+    return [*polarity, (mask & LEX_NEUTRAL) >> 2, 0, 0]
+
+
+def count_sentiment_words_batch(texts: list, negation: bool = False) -> np.ndarray:
+    """
+    count_sentiment_words for a whole corpus. Each chunk of texts is joined
+    and scanned once for lexicon terms, giving a sparse document x term
+    count matrix that is multiplied by the term weight matrix.
+
+    Parameters:
+        texts (list): Feedback texts or clauses.
+        negation (bool): Add negated-bigram features ("not good"): two more
+            columns counting positive / negative words directly preceded by
+            a negation word (see LEXICON_COUNT_COLUMNS).
+
+    Returns:
+        np.ndarray: int array of shape (len(texts), 3 or 5); the first three
+        columns equal count_sentiment_words(text) row by row.
+    """
+    scanner = _lexicon_scanner(negation)
+    n_cols = 5 if negation else 3
+    results = [np.zeros((0, n_cols), dtype=np.int64)]
+    for offset in range(0, len(texts), LEXICON_BATCH_SIZE):
+        chunk = [t.replace(DOC_SEPARATOR, "\x01") for t in texts[offset:offset + LEXICON_BATCH_SIZE]]
+        found = np.array(scanner.findall(DOC_SEPARATOR.join(chunk).lower()), dtype=str)
+        found = found.reshape(len(found), 2 if negation else 1)  # [bigram,] word per hit
+        words = found[:, -1]
+        is_separator = words == ""
+        doc_ids = np.cumsum(is_separator)
+        terms, term_docs = [words[~is_separator]], [doc_ids[~is_separator]]
+        if negation:
+            has_bigram = found[:, 0] != ""
+            terms.append(found[has_bigram, 0])
+            term_docs.append(doc_ids[has_bigram])
+        terms, term_docs = np.concatenate(terms), np.concatenate(term_docs)
+
+        vocabulary, term_ids = np.unique(terms, return_inverse=True)
+        weights = np.array([_term_weights(t) for t in vocabulary.tolist()], dtype=np.int64)
+        counts = sparse.csr_matrix(
+            (np.ones(len(term_ids), dtype=np.int64), (term_docs, term_ids)),
+            shape=(len(chunk), len(vocabulary))
+        )
+        results.append(counts @ weights.reshape(len(vocabulary), 5)[:, :n_cols])
+    return np.concatenate(results)
 
 
 def get_model_and_vectorizer():
@@ -328,6 +599,35 @@ def get_model_and_vectorizer():
 # MAIN PREDICTION FUNCTION
 # ═══════════════════════════════════════════════════════════════════════
 
+# Score TF-IDF + Logistic Regression models with linear_scorer instead of
+# sklearn's transform / predict / predict_proba (same results, no per-call
+# validation); other models always go through sklearn
+LINEAR_SCORING = True
+
+
+def score_docs(docs: list, model, vectorizer):
+    """
+    Run the ML model for every document that has model input and no scores
+    yet, in one pass for all of them (LinearSentimentScorer when it supports
+    the model, else one vectorizer.transform / predict / predict_proba call).
+    Sets doc.scores = (predicted label, probability row).
+    """
+    pending = [doc for doc in docs if doc.scores is None and doc.cleaned]
+    if not pending:
+        return
+    token_input = uses_token_input(vectorizer)
+    inputs = [doc.cleaned if token_input else ' '.join(doc.cleaned) for doc in pending]
+    scorer = get_linear_scorer(model, vectorizer) if LINEAR_SCORING else None
+    if scorer is not None:
+        labels, proba = scorer.score(inputs)
+    else:
+        features = vectorizer.transform(inputs)
+        labels   = model.predict(features)
+        proba    = model.predict_proba(features)
+    for doc, label, row in zip(pending, labels, proba):
+        doc.scores = (label, row)
+
+
 def predict_sentiment(text: str, model, vectorizer) -> dict:
     """
     Predict sentiment using a multi-layer approach:
@@ -336,19 +636,21 @@ def predict_sentiment(text: str, model, vectorizer) -> dict:
       3. ML model prediction
       4. Negation-context analysis
       5. Word-count tiebreaker for short texts
+
+    `text` may be a FeedbackDoc, whose derived forms (and model scores, see
+    score_docs) are then shared by every step.
     """
-    cleaned = preprocess(text)
+    doc     = as_doc(text)
+    cleaned = doc.cleaned
     if not cleaned:
         return {"label": "Neutral", "confidence": 0.5, "probabilities": {}}
 
-    text_lower = text.lower().strip()
-    tokens     = re.findall(r"[\w']+", text_lower)
-    word_count = len(tokens)
+    word_count = len(doc.tokens)
 
     # ── Step 1: ML model (always run) ────────────────────────────────
-    features   = vectorizer.transform([cleaned])
-    ml_label   = model.predict(features)[0]
-    proba      = model.predict_proba(features)[0]
+    if doc.scores is None:
+        score_docs([doc], model, vectorizer)
+    ml_label, proba = doc.scores
     classes    = model.classes_
     proba_dict = {c: round(float(p), 4) for c, p in zip(classes, proba)}
     ml_conf    = round(float(max(proba)), 4)
@@ -359,7 +661,7 @@ def predict_sentiment(text: str, model, vectorizer) -> dict:
     second_label, second_conf = sorted_proba[1] if len(sorted_proba) > 1 else (top_label, 0)
 
     # ── Step 2: Sarcasm detection ─────────────────────────────────────
-    is_sarcastic = detect_sarcasm(text)
+    is_sarcastic = detect_sarcasm(doc)
     if is_sarcastic and top_label in ("Positive", "Neutral"):
         # Sarcasm almost always means negative in student feedback
         label      = "Negative"
@@ -367,16 +669,16 @@ def predict_sentiment(text: str, model, vectorizer) -> dict:
         return {"label": label, "confidence": confidence, "probabilities": proba_dict}
 
     # ── Step 3: Phrase dictionary check ──────────────────────────────
-    phrase_result = check_phrases(text)
+    phrase_result = check_phrases(doc)
 
     # ── Step 4: Negation-context analysis ────────────────────────────
-    negation_hint = detect_negation_context(text)
+    negation_hint = detect_negation_context(doc)
 
     # ── Step 5: Word counts ───────────────────────────────────────────
-    pos_cnt, neg_cnt, neu_cnt = count_sentiment_words(text)
+    pos_cnt, neg_cnt, neu_cnt = count_sentiment_words(doc)
 
     # ── Step 6: Contrast detection ────────────────────────────────────
-    has_contrast = bool(CONTRAST_RE.search(text))
+    has_contrast = bool(CONTRAST_RE.search(doc.text))
 
     # ── Decision logic ────────────────────────────────────────────────
 
@@ -475,55 +777,117 @@ def predict_sentiment(text: str, model, vectorizer) -> dict:
 # CLAUSE SPLITTING
 # ═══════════════════════════════════════════════════════════════════════
 
+CLAUSE_SPLIT_RE = re.compile(
+    r'[;]|\b(?:but|however|although|though|yet|despite|whereas|while|except|nevertheless|nonetheless|on the other hand|that said|even so)\b',
+    re.I
+)
+
+
+def _strip_span(text: str, start: int, end: int) -> tuple:
+    """Offsets of text[start:end].strip().strip(',').strip() within text."""
+    for is_junk in (str.isspace, ','.__eq__, str.isspace):
+        while start < end and is_junk(text[start]):
+            start += 1
+        while end > start and is_junk(text[end - 1]):
+            end -= 1
+    return start, end
+
+
+def split_into_clause_spans(text: str) -> list:
+    """
+    Like split_into_clauses, but returns (start, end) offsets into `text`.
+    Falls back to the whole text as a single span.
+    """
+    spans = []
+    prev = 0
+    for sep in [*CLAUSE_SPLIT_RE.finditer(text), None]:
+        start, end = _strip_span(text, prev, sep.start() if sep else len(text))
+        if start < end and len(text[start:end].split()) >= 3:
+            spans.append((start, end))
+        if sep:
+            prev = sep.end()
+    return spans if spans else [(0, len(text))]
+
+
 def split_into_clauses(text: str) -> list:
     """
     Split feedback into clauses on contrast connectors and punctuation.
     Ensures each clause is meaningful (> 4 words).
     """
-    parts = re.split(
-        r'[;]|\b(?:but|however|although|though|yet|despite|whereas|while|except|nevertheless|nonetheless|on the other hand|that said|even so)\b',
-        text, flags=re.I
-    )
-    result = []
-    for p in parts:
-        p = p.strip().strip(',').strip()
-        if p and len(p.split()) >= 3:
-            result.append(p)
-    return result if result else [text]
+    return [text[start:end] for start, end in split_into_clause_spans(text)]
+
+
+def map_aspects_to_clauses(text: str, taxonomy=None) -> tuple:
+    """
+    Detect aspects and pick, for each, the last clause mentioning one of its
+    keywords (the full text if none does). Clauses are assigned from the
+    keyword match offsets, without scanning the clauses again.
+    `taxonomy` selects the aspect taxonomy (see aspect_extraction.get_matcher).
+
+    Returns:
+        tuple: (aspects, {aspect: clause})
+    """
+    matcher = get_matcher(taxonomy)
+    matches = matcher.find_matches(text)
+    aspects = matcher.aspects_from_matches(matches)
+    aspect_clause_map = {aspect: text for aspect in aspects}
+    for start, end in split_into_clause_spans(text):
+        for m in matches:
+            if start <= m.start and m.end <= end:
+                aspect_clause_map[m.aspect] = text[start:end]
+    return aspects, aspect_clause_map
 
 
 # ═══════════════════════════════════════════════════════════════════════
 # FULL ABSA PIPELINE
 # ═══════════════════════════════════════════════════════════════════════
 
-def analyze_feedback(text: str, model, vectorizer) -> dict:
+def analyze_feedback(text: str, model, vectorizer, taxonomy=None, tenant: str = None, cache=None) -> dict:
     """
     Full ABSA pipeline:
     1. Split into clauses
     2. Map each detected aspect to its best clause
     3. Predict sentiment per-clause (per-aspect)
     4. Predict overall sentiment on full text
+
+    `taxonomy` is an optional taxonomy file or AspectMatcher (default: built-in
+    aspects); `tenant` selects a taxonomy registered with aspect_extraction.register_tenant.
+    `cache` is an optional result_cache.ResultCache consulted before any work.
     """
-    clauses = split_into_clauses(text)
-    all_aspects = extract_aspects(text)
+    matcher = get_matcher(taxonomy, tenant)
+
+    if cache is not None:
+        key = cache.key(text, model, vectorizer, matcher)
+        cached = cache.get(key, text)
+        if cached is not None:
+            return cached
 
     # Map each aspect to the clause that mentions it
-    aspect_clause_map = {}
-    for aspect in all_aspects:
-        keywords    = ASPECT_KEYWORDS.get(aspect, [])
-        best_clause = text  # default: full text
-        for clause in clauses:
-            for kw in keywords:
-                if re.search(r'\b' + re.escape(kw) + r'\b', clause, re.I):
-                    best_clause = clause
-                    break
-        aspect_clause_map[aspect] = best_clause
+    all_aspects, aspect_clause_map = map_aspects_to_clauses(text, matcher)
+
+    # One document per distinct clause; a clause equal to the full text
+    # shares the overall document
+    docs = {unit: FeedbackDoc(unit) for unit in (text, *aspect_clause_map.values())}
+    result = _feedback_result(text, all_aspects, aspect_clause_map, docs, model, vectorizer)
+    if cache is not None:
+        cache.put(key, result)
+    return result
+
+
+def _feedback_result(text: str, all_aspects: list, aspect_clause_map: dict, docs: dict, model, vectorizer) -> dict:
+    """
+    Assemble the analyze_feedback record. `docs` holds a FeedbackDoc for the
+    text and each of its clauses; each distinct one is predicted once.
+    """
+    predictions = {}
 
     # Predict sentiment per aspect
     aspect_results = []
     for aspect in all_aspects:
         clause = aspect_clause_map[aspect]
-        sr     = predict_sentiment(clause, model, vectorizer)
+        if clause not in predictions:
+            predictions[clause] = predict_sentiment(docs[clause], model, vectorizer)
+        sr     = predictions[clause]
         score  = SENTIMENT_SCORES.get(sr["label"], 0.0)
         aspect_results.append({
             "aspect":       aspect,
@@ -532,33 +896,218 @@ def analyze_feedback(text: str, model, vectorizer) -> dict:
             "score":        score,
             "color":        SENTIMENT_COLORS[sr["label"]],
             "emoji":        SENTIMENT_EMOJI[sr["label"]],
-            "probabilities": sr["probabilities"]
+            "probabilities": dict(sr["probabilities"])
         })
 
     # Overall sentiment from full text
-    overall_sr    = predict_sentiment(text, model, vectorizer)
+    doc = docs[text]
+    if text not in predictions:
+        predictions[text] = predict_sentiment(doc, model, vectorizer)
+    overall_sr    = predictions[text]
     overall_score = np.mean([r["score"] for r in aspect_results]) if aspect_results else SENTIMENT_SCORES.get(overall_sr["label"], 0.0)
 
     return {
         "original_text":  text,
-        "processed_text": preprocess(text),
+        "processed_text": ' '.join(doc.cleaned),
         "aspects":        all_aspects,
         "sentiment":      overall_sr["label"],
         "confidence":     overall_sr["confidence"],
         "overall_score":  round(float(overall_score), 3),
-        "probabilities":  overall_sr["probabilities"],
+        "probabilities":  dict(overall_sr["probabilities"]),
         "aspect_results": aspect_results,
         "color":          SENTIMENT_COLORS[overall_sr["label"]],
         "emoji":          SENTIMENT_EMOJI[overall_sr["label"]]
     }
 
 
-def analyze_batch(texts: list, model, vectorizer) -> list:
-    return [
-        analyze_feedback(str(t), model, vectorizer)
-        for t in texts
-        if isinstance(t, str) and t.strip()
-    ]
+# Smallest shard worth sending to a worker process in analyze_batch
+MIN_SHARD_ROWS = 256
+
+# Model, vectorizer and aspect matcher of a parallel analyze_batch worker,
+# set by its pool initializer (only ever filled in worker processes, so
+# concurrent callers in the parent cannot see each other's state)
+_BATCH_STATE = {}
+
+
+def _init_batch_worker(model, vectorizer, matcher):
+    _BATCH_STATE.update(model=model, vectorizer=vectorizer, matcher=matcher)
+
+
+def _analyze_shard(texts: list) -> list:
+    """Worker task: analyse one shard of the batch in-process."""
+    state = _BATCH_STATE
+    return analyze_batch(texts, state["model"], state["vectorizer"], taxonomy=state["matcher"])
+
+
+def pipeline_version(model, vectorizer, matcher) -> str:
+    """Version of everything that shapes a result: model, taxonomy, lexicons and rules."""
+    return f"{model_version(model, vectorizer)}-{matcher.version}-{LEXICON_VERSION}-r{RULES_VERSION}"
+
+
+def analyze_batch(texts: list, model, vectorizer, n_jobs: int = 1, chunksize: int = None,
+                  taxonomy=None, tenant: str = None, cache=None, store=None,
+                  near_duplicates: float = None) -> list:
+    """
+    Analyse many feedback texts as one batch. Every distinct feedback text
+    and assigned clause across the batch becomes one FeedbackDoc; they are
+    preprocessed, lexicon-counted (count_sentiment_words_batch) and
+    model-scored (score_docs) in bulk, then the results are assembled per
+    feedback. The taxonomy is resolved once, so a reload mid-batch cannot
+    mix taxonomies.
+
+    Parameters:
+        n_jobs (int): Worker processes (-1 = all cores). The batch is split
+            into shards of `chunksize` rows, each analysed by a worker;
+            results keep input order. On Linux workers are forked, sharing
+            the already-loaded model copy-on-write; elsewhere the platform's
+            default start method pickles the model to each worker.
+        cache (ResultCache): Optional in-process result cache.
+        store (ResultStore): Optional persistent result store, consulted
+            after the cache; only rows found in neither are analysed.
+        near_duplicates (float): Optional similarity threshold (0-1). Rows
+            whose estimated shingle Jaccard similarity reaches it are
+            grouped (MinHash/LSH, see near_duplicates.py) and take the
+            analysis of their cluster's first row; rows only group if
+            their aspects, phrases, sarcasm cues and sentiment words match
+            (see collapse_near_duplicate_feedback). Off by default.
+
+    Rows that differ only in case are analysed once (see dedupe_texts);
+    every row still gets its own record.
+    """
+    matcher = get_matcher(taxonomy, tenant)
+    texts = [str(t) for t in texts if isinstance(t, str) and t.strip()]
+
+    unique, index = dedupe_texts(texts)
+    if len(unique) < len(texts):
+        results = analyze_batch(unique, model, vectorizer, n_jobs, chunksize, taxonomy=matcher,
+                                cache=cache, store=store, near_duplicates=near_duplicates)
+        return fan_out(results, texts, index)
+
+    if near_duplicates is not None:
+        representatives, index, _ = collapse_near_duplicate_feedback(texts, near_duplicates, matcher)
+        if len(representatives) < len(texts):
+            results = analyze_batch(representatives, model, vectorizer, n_jobs, chunksize,
+                                    taxonomy=matcher, cache=cache, store=store)
+            return fan_out(results, texts, index, reprocess=True)
+
+    if cache is not None:
+        keys = [cache.key(t, model, vectorizer, matcher) for t in texts]
+        results = [cache.get(k, t) for k, t in zip(keys, texts)]
+        missing = [i for i, r in enumerate(results) if r is None]
+        computed = analyze_batch([texts[i] for i in missing], model, vectorizer, n_jobs, chunksize,
+                                 taxonomy=matcher, store=store)
+        for i, result in zip(missing, computed):
+            cache.put(keys[i], result)
+            results[i] = result
+        return results
+
+    if store is not None:
+        version = pipeline_version(model, vectorizer, matcher)
+        results = store.get_many(texts, version)
+        missing = [i for i, r in enumerate(results) if r is None]
+        computed = analyze_batch([texts[i] for i in missing], model, vectorizer, n_jobs, chunksize, taxonomy=matcher)
+        store.put_many([texts[i] for i in missing], computed, version)
+        for i, result in zip(missing, computed):
+            results[i] = result
+        return results
+
+    n_jobs = resolve_n_jobs(n_jobs)
+    if n_jobs > 1 and len(texts) >= 2 * MIN_SHARD_ROWS:
+        return _analyze_parallel(texts, model, vectorizer, matcher, n_jobs, chunksize)
+
+    mappings = [map_aspects_to_clauses(t, matcher) for t in texts]
+    units = list(dict.fromkeys(u for t, (_, clause_map) in zip(texts, mappings)
+                               for u in (t, *clause_map.values())))
+    counts = count_sentiment_words_batch(units).tolist()
+    docs = {u: FeedbackDoc(u, preprocess_tokens(u), tuple(n)) for u, n in zip(units, counts)}
+    score_docs(list(docs.values()), model, vectorizer)
+
+    return [_feedback_result(t, aspects, clause_map, docs, model, vectorizer)
+            for t, (aspects, clause_map) in zip(texts, mappings)]
+
+
+def dedupe_texts(texts: list) -> tuple:
+    """
+    Collapse texts that differ only in case (the ResultCache key form,
+    normalize_key_text), which the analysis ignores; whitespace is kept, as
+    it can change the result.
+
+    Returns:
+        tuple: (unique, index) — the first occurrence of each distinct text,
+        and for every input row the position of its text in `unique`.
+    """
+    positions = {}
+    unique, index = [], []
+    for text in texts:
+        key = normalize_key_text(text)
+        position = positions.get(key)
+        if position is None:
+            position = positions[key] = len(unique)
+            unique.append(text)
+        index.append(position)
+    return unique, index
+
+
+def fan_out(results: list, texts: list, index: list, reprocess: bool = False) -> list:
+    """
+    Expand per-unique results back to one record per row (see dedupe_texts).
+    The first row of each group takes the record itself; later rows get a
+    copy carrying their own original_text, so no two rows share a dict.
+
+    Parameters:
+        reprocess (bool): Also recompute processed_text of the copies, for
+            groups whose members differ in wording (near duplicates).
+    """
+    taken = [False] * len(results)
+    rows = []
+    for text, position in zip(texts, index):
+        if taken[position]:
+            row = copy_result(results[position], text)
+            if reprocess:
+                row["processed_text"] = ' '.join(preprocess_tokens(text))
+            rows.append(row)
+        else:
+            taken[position] = True
+            rows.append(results[position])
+    return rows
+
+
+def collapse_near_duplicate_feedback(texts: list, threshold: float, taxonomy=None, tenant: str = None) -> tuple:
+    """
+    collapse_near_duplicates for feedback: rows only join a cluster if they
+    share their detected aspects, matched phrases, sarcasm pattern and, in
+    order, their negators and polarity words (NEAR_DUPLICATE_GUARD_WORDS),
+    so every member would get the representative's analysis.
+
+    Returns:
+        tuple: (representatives, index, stats), as collapse_near_duplicates.
+    """
+    matcher = get_matcher(taxonomy, tenant)
+    keys = list(zip(
+        map(tuple, matcher.extract_batch(texts)),
+        (frozenset(check_phrases(t, return_matches=True)[1]) for t in texts),
+        (detect_sarcasm(t, return_pattern=True) for t in texts),
+        guard_sequences(texts, NEAR_DUPLICATE_GUARD_WORDS),
+    ))
+    return collapse_near_duplicates(texts, threshold, guard_keys=keys)
+
+
+def _analyze_parallel(texts: list, model, vectorizer, matcher, n_jobs: int, chunksize: int = None) -> list:
+    """Shard analyze_batch over a process pool; results in input order."""
+    if chunksize is None:
+        chunksize = max(MIN_SHARD_ROWS, math.ceil(len(texts) / (n_jobs * 4)))
+    shards = [texts[i:i + chunksize] for i in range(0, len(texts), chunksize)]
+
+    get_lemmatizer()  # load NLTK data once here, so forked workers inherit it
+    # The state travels with this pool's workers. Fork is kept where it has
+    # always been the default (Linux): workers receive the initargs
+    # unpickled and share the model copy-on-write. Elsewhere (macOS, where
+    # fork is unsafe, and Windows) the default context pickles the initargs
+    pool_args = {"initializer": _init_batch_worker, "initargs": (model, vectorizer, matcher)}
+    if sys.platform.startswith("linux"):
+        pool_args["mp_context"] = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(max_workers=min(n_jobs, len(shards)), **pool_args) as pool:
+        return [r for shard in pool.map(_analyze_shard, shards) for r in shard]
 
 
 # ═══════════════════════════════════════════════════════════════════════
@@ -601,6 +1150,7 @@ def compute_summary_stats(results: list) -> dict:
     neu = sentiments.count("Neutral")
     neg = sentiments.count("Negative")
     total = len(sentiments)
+    unique = len({normalize_key_text(r["original_text"]) for r in results})
 
     aspect_sentiment = {}
     for r in results:
@@ -625,6 +1175,8 @@ def compute_summary_stats(results: list) -> dict:
         "neutral_pct":      round(neu / total * 100, 1) if total else 0,
         "negative_pct":     round(neg / total * 100, 1) if total else 0,
         "avg_score":        round(float(np.mean(scores)), 3) if scores else 0,
+        "unique":           unique,
+        "duplicate_pct":    round((total - unique) / total * 100, 1) if total else 0,
         "aspect_counts":    aspect_counts,
         "aspect_sentiment": aspect_sentiment,
         "all_texts":        " ".join(r["original_text"] for r in results)
@@ -0,0 +1,141 @@
+"""
+result_cache.py
+---------------
+In-process LRU cache of analyze_feedback results. Entries are keyed by
+the lowercased feedback text together with the model and taxonomy versions, so a retrained model or edited
+taxonomy never serves stale results. Safe to share between threads,
+e.g. Streamlit sessions.
+"""
+
+import hashlib
+import pickle
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+
+# Default limits of a ResultCache
+CACHE_MAX_ENTRIES = 50_000
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+_object_digests = weakref.WeakKeyDictionary()
+_digest_lock = threading.Lock()
+
+
+def normalize_key_text(text: str) -> str:
+    """
+    Cache form of a feedback text: lowercased. The analysis ignores case,
+    but not whitespace (line breaks and gap lengths matter to the sarcasm
+    patterns), so whitespace is kept as is.
+    """
+    return text.lower()
+
+
+def object_digest(obj) -> str:
+    """Content hash of a picklable object (e.g. a fitted model), computed once per object."""
+    with _digest_lock:
+        digest = _object_digests.get(obj)
+    if digest is None:
+        digest = hashlib.sha1(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)).hexdigest()[:16]
+        with _digest_lock:
+            _object_digests[obj] = digest
+    return digest
+
+
+def model_version(model, vectorizer) -> str:
+    """Version string of a (model, vectorizer) pair."""
+    return f"{object_digest(model)}-{object_digest(vectorizer)}"
+
+
+def copy_result(result: dict, original_text: str = None) -> dict:
+    """Copy an analyze_feedback record, optionally re-pointing original_text."""
+    copied = dict(result)
+    copied["aspects"] = list(result["aspects"])
+    copied["probabilities"] = dict(result["probabilities"])
+    copied["aspect_results"] = [
+        {**r, "probabilities": dict(r["probabilities"])} for r in result["aspect_results"]
+    ]
+    if original_text is not None:
+        copied["original_text"] = original_text
+    return copied
+
+
+def result_size(result: dict) -> int:
+    """Approximate memory held by an analyze_feedback record, in bytes."""
+    size = sys.getsizeof(result) + sum(sys.getsizeof(v) for v in result.values() if isinstance(v, str))
+    size += sys.getsizeof(result["probabilities"]) + sys.getsizeof(result["aspects"])
+    for r in result["aspect_results"]:
+        size += sys.getsizeof(r) + sys.getsizeof(r["probabilities"])
+    return size
+
+
+class ResultCache:
+    """
+    Bounded LRU cache of analyze_feedback results.
+
+    Parameters:
+        max_entries (int): Most results kept.
+        max_bytes (int): Most (approximate) bytes kept, see result_size.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (result, size), oldest first
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(text: str, model, vectorizer, matcher) -> tuple:
+        """Cache key of `text` analysed with this model and aspect matcher."""
+        return normalize_key_text(text), model_version(model, vectorizer), matcher.version
+
+    def get(self, key: tuple, original_text: str):
+        """A copy of the cached result with original_text set, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy_result(entry[0], original_text)
+
+    def put(self, key: tuple, result: dict):
+        """Store a copy of `result`, evicting least recently used entries over budget."""
+        result = copy_result(result)
+        size = result_size(result)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (result, size)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        """Entry count, approximate bytes, and hit / miss counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries":   len(self._entries),
+                "bytes":     self._bytes,
+                "hits":      self.hits,
+                "misses":    self.misses,
+                "hit_rate":  self.hits / lookups if lookups else 0.0,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,159 @@
+"""
+result_store.py
+---------------
+Persistent, content-addressed store of analyze_feedback results in SQLite,
+so overlapping exports uploaded week after week are only analysed once.
+Rows are keyed by the SHA-256 of the lowercased text plus a pipeline
+version (model, taxonomy and lexicons); results of any other version are
+never returned and are purged with purge_stale(). Old and least recently
+used rows are evicted by age and total size.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from result_cache import copy_result, normalize_key_text
+
+RESULT_STORE_PATH = os.path.join("model", "result_store.sqlite3")
+
+# Default eviction limits
+STORE_MAX_AGE_DAYS = 180
+STORE_MAX_BYTES = 512 * 1024 * 1024
+# Rows written between automatic evict() runs
+STORE_EVICT_EVERY = 10_000
+# Version of the text_key scheme (PRAGMA user_version); files written with
+# an older scheme are emptied on open. 2: keys no longer fold whitespace
+KEY_SCHEME = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key      TEXT NOT NULL,
+    version  TEXT NOT NULL,
+    result   TEXT NOT NULL,
+    size     INTEGER NOT NULL,
+    created  REAL NOT NULL,
+    accessed REAL NOT NULL,
+    PRIMARY KEY (key, version)
+);
+CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed);
+"""
+
+
+def text_key(text: str) -> str:
+    """Content address of a feedback text: SHA-256 of its lowercased form (normalize_key_text)."""
+    return hashlib.sha256(normalize_key_text(text).encode("utf-8")).hexdigest()
+
+
+class ResultStore:
+    """
+    SQLite-backed result store; one connection shared by all threads.
+
+    Parameters:
+        path (str): Database file (created with its directory if missing).
+        max_age_days (float): Rows not written for this long are evicted.
+        max_bytes (int): Total stored result size kept by evict().
+    """
+
+    def __init__(self, path: str = RESULT_STORE_PATH, max_age_days: float = STORE_MAX_AGE_DAYS,
+                 max_bytes: int = STORE_MAX_BYTES):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.max_age_days = max_age_days
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] < KEY_SCHEME:
+                # Older keys may map texts the pipeline tells apart to one row
+                self._conn.execute("DELETE FROM results")
+                self._conn.execute(f"PRAGMA user_version = {KEY_SCHEME}")
+        self._written = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, texts: list, version: str) -> list:
+        """Stored result (with the caller's original_text) or None, per text."""
+        keys = [text_key(t) for t in texts]
+        found = {}
+        with self._lock:
+            unique = list(dict.fromkeys(keys))
+            for i in range(0, len(unique), 500):  # stay under SQLite's parameter limit
+                part = unique[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, result FROM results WHERE version = ? AND key IN ({','.join('?' * len(part))})",
+                    [version, *part]
+                ).fetchall()
+                found.update(rows)
+            if found:
+                with self._conn:
+                    self._conn.executemany(
+                        "UPDATE results SET accessed = ? WHERE key = ? AND version = ?",
+                        [(time.time(), key, version) for key in found]
+                    )
+        results = [copy_result(json.loads(found[key]), text) if key in found else None
+                   for text, key in zip(texts, keys)]
+        hits = sum(r is not None for r in results)
+        with self._lock:
+            self.hits += hits
+            self.misses += len(results) - hits
+        return results
+
+    def put_many(self, texts: list, results: list, version: str):
+        """Store results for `texts` under `version`, replacing existing rows."""
+        now = time.time()
+        rows = []
+        for text, result in zip(texts, results):
+            payload = json.dumps(result)
+            rows.append((text_key(text), version, payload, len(payload), now, now))
+        with self._lock:
+            with self._conn:
+                self._conn.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._written += len(rows)
+            evict = self._written >= STORE_EVICT_EVERY
+        if evict:
+            self.evict()
+
+    def purge_stale(self, version: str) -> int:
+        """Delete rows of every other pipeline version; returns rows deleted."""
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM results WHERE version != ?", (version,)).rowcount
+
+    def evict(self) -> int:
+        """Apply the age and size limits; returns rows deleted."""
+        with self._lock, self._conn:
+            self._written = 0
+            cutoff = time.time() - self.max_age_days * 86400
+            deleted = self._conn.execute("DELETE FROM results WHERE created < ?", (cutoff,)).rowcount
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+            if total > self.max_bytes:
+                # Least recently used first, until back under budget
+                excess = total - self.max_bytes
+                doomed = []
+                for key, version, size in self._conn.execute(
+                        "SELECT key, version, size FROM results ORDER BY accessed"):
+                    doomed.append((key, version))
+                    excess -= size
+                    if excess <= 0:
+                        break
+                self._conn.executemany("DELETE FROM results WHERE key = ? AND version = ?", doomed)
+                deleted += len(doomed)
+            return deleted
+
+    def stats(self) -> dict:
+        """Row count, stored bytes, and hit / miss counters of this process."""
+        with self._lock:
+            count, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        lookups = self.hits + self.misses
+        return {"entries": count, "bytes": size, "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
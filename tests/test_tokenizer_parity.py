@@ -0,0 +1,63 @@
+"""
+test_tokenizer_parity.py
+------------------------
+The fast tokenizer re-implements NLTK word_tokenize (Punkt + Treebank,
+incl. TREEBANK_SPLITS) for the cleaned text preprocess produces. Cleaned
+text has no sentence punctuation, so Punkt leaves it whole and the
+Treebank tokenizer alone is the reference; it needs no NLTK data. Only
+the word_tokenize check is skipped when the punkt_tab data is missing.
+Run with `python -m pytest tests`.
+"""
+
+import os
+import random
+import sys
+
+import pytest
+from nltk.tokenize.destructive import NLTKWordTokenizer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import data_preprocessing as dp
+from _common import synthetic_corpus
+from model_training import TRAINING_DATA
+
+treebank_tokenize = NLTKWordTokenizer().tokenize
+
+
+def word_soup(n_rows: int, seed: int = 7) -> list:
+    """Random word sequences that include every Treebank split and near misses."""
+    rng = random.Random(seed)
+    vocab = sorted({w for t, _ in TRAINING_DATA for w in dp.normalize_text(t).split()})
+    vocab += list(dp.TREEBANK_SPLITS) + ["wannabe", "cannon", "gotten", "gonnaa"]
+    return [" ".join(rng.choice(vocab) for _ in range(rng.randint(0, 40)))
+            + rng.choice(["", " ", "\n", "\t "]) for _ in range(n_rows)]
+
+
+def assert_parity(docs: list, reference=treebank_tokenize):
+    for doc in docs:
+        cleaned = dp.normalize_text(doc)
+        assert dp.tokenize(cleaned, 'fast') == reference(cleaned), doc
+
+
+def test_parity_on_training_data():
+    assert_parity([text for text, _ in TRAINING_DATA])
+
+
+def test_parity_on_synthetic_corpus():
+    assert_parity(synthetic_corpus(5_000))
+
+
+def test_parity_on_treebank_splits():
+    assert_parity(word_soup(2_000))
+
+
+def test_treebank_splits_are_applied():
+    assert dp.tokenize("we cannot wait gonna go", 'fast') == ["we", "can", "not", "wait", "gon", "na", "go"]
+
+
+@pytest.mark.skipif("punkt_tab" in dp.missing_nltk_resources(),
+                    reason="NLTK punkt_tab data not installed (python data_preprocessing.py --download)")
+def test_parity_with_word_tokenize():
+    assert_parity(synthetic_corpus(1_000) + word_soup(500), lambda text: dp.tokenize(text, 'nltk'))